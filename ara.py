@@ -0,0 +1,152 @@
+import time
+from astar import grid_heuristic
+from priority_queue import make_queue
+from utils import SearchResult, reconstruct_path, stop_search
+
+CLOCK_EVERY = 256  # cells rescanned between two deadline checks at the end of a round
+
+# Anytime Repairing A* (ARA*, Likhachev, Gordon & Thrun). A* with the heuristic inflated by a weight finds a
+# path quickly whose cost is at most weight times the optimum. The weight is then lowered step by step and the
+# search carries on from where it stopped instead of starting over: only nodes that got cheaper after they were
+# expanded are expanded again. Work is done under a time or expansion budget and can be resumed by the next
+# call, so a control loop with a deadline per tick always has the best path found so far and a bound on how far
+# from optimal it can be.
+
+class AnytimeResult(SearchResult):  # a path plus its suboptimality bound: cost <= bound * optimal cost
+    def __init__(self, path, cost, expanded, bound, weight, stats=None):
+        super().__init__(path, cost, expanded, stats=stats)
+        self.bound = bound
+        self.weight = weight  # heuristic weight of the round that found the path
+
+    def __repr__(self):
+        return f"AnytimeResult(found={self.found}, cost={self.cost}, bound={self.bound:.3f}, expanded={self.expanded})"
+
+
+class AnytimeAStar:
+    def __init__(self, grid, start, end, weight=3.0, step=0.5, queue='lazy', heuristic=None):
+        self.grid = grid
+        self.start = grid.index(*start)
+        self.end = grid.index(*end)
+        self.goal = end
+        self.estimate = grid_heuristic(grid, heuristic)  # must be admissible for the bounds to hold
+        self.weight = max(1.0, weight)
+        self.step = step  # how much the weight drops after every round
+        self.queue = queue
+        self.g = {self.start: 0}
+        self.h = {}  # heuristic of every node seen, the open set is re-keyed with it after each round
+        self.came_from = {}
+        self.open_set = make_queue(queue)
+        self.open_set.push(self.start, self.weight * self._h(self.start))
+        self.closed = set()  # expanded in the current round
+        self.inconsistent = set()  # got cheaper after being expanded in this round, reopened in the next one
+        self.pending = None  # open and inconsistent cells still to rescan after a round, None while a round runs
+        self.path = None  # flat cells of the path of the round being rescanned
+        self.lower = float("inf")  # lowest g + h of the cells rescanned so far
+        self.next_open = None  # the open set of the next round, filled by the rescan
+        self.expanded = 0
+        self.result = None  # best AnytimeResult so far
+        self.done = False  # the search is over: result is optimal, or there is no path
+        self.cancelled = False
+
+    def _h(self, cell):
+        h = self.h.get(cell)
+        if h is None:
+            h = self.h[cell] = self.estimate(self.grid.position(cell), self.goal)
+        return h
+
+    def improve(self, seconds=None, expansions=None, observer=None, clock=time.perf_counter):
+        # searches until the budget is spent or the path is optimal, yields an AnytimeResult for every better path
+        # or tighter bound. The next call picks up where this one stopped
+        deadline = None if seconds is None else clock() + seconds
+        limit = None if expansions is None else self.expanded + expansions
+        grid, g, came_from, closed, inconsistent = self.grid, self.g, self.came_from, self.closed, self.inconsistent
+        h = self._h
+        end = self.end
+        inf = float("inf")
+        while not self.done:
+            weight = self.weight
+            if self.pending is None:
+                open_set = self.open_set
+                # one round of weighted A*, until nothing left open can lead to a cheaper path to the end
+                while open_set and open_set.peek()[1] < g.get(end, inf):
+                    if (limit is not None and self.expanded >= limit) or (deadline is not None and clock() >= deadline):
+                        return
+                    current_node = open_set.pop()[0]
+                    closed.add(current_node)
+                    self.expanded += 1
+                    for neighbor, step_cost in grid.edges(current_node):
+                        temp_g_score = g[current_node] + step_cost
+                        if temp_g_score < g.get(neighbor, inf):
+                            g[neighbor] = temp_g_score
+                            came_from[neighbor] = current_node
+                            if neighbor in closed:
+                                inconsistent.add(neighbor)
+                            else:
+                                open_set.push(neighbor, temp_g_score + weight * h(neighbor))
+                                if observer is not None:
+                                    observer.opened(neighbor)
+                    if observer is not None:
+                        if current_node != self.start:
+                            observer.closed(current_node, g[current_node])
+                        if not observer.step():
+                            self.cancelled = self.done = True
+                            return
+                if end not in g:  # the whole reachable map was searched
+                    self.done = True
+                    return
+                # nodes improved after their parents were expanded make the path cheaper than g[end], measure it
+                self.path = reconstruct_path(came_from, end, self.start)
+                self.pending = list(set(open_set) | inconsistent)
+                self.pending.reverse()  # popped from the back, so they are queued in the order they were found
+                self.lower = inf
+                self.next_open = make_queue(self.queue)
+                closed.clear()
+                inconsistent.clear()
+            # every node that could still lead somewhere cheaper is open or inconsistent, none of them can beat
+            # the lowest g + h among them. The same pass queues them for the next round with the smaller weight;
+            # on a big open set it can outlast the deadline too, and is then finished by the next call
+            pending, next_open, lower = self.pending, self.next_open, self.lower
+            next_weight = max(1.0, weight - self.step)
+            while pending:
+                if deadline is not None and len(pending) % CLOCK_EVERY == 0 and clock() >= deadline:
+                    self.lower = lower
+                    return
+                cell = pending.pop()
+                cell_h = h(cell)
+                lower = min(lower, g[cell] + cell_h)
+                if weight > 1.0:  # after the round with weight 1 the search is over, there is no next round
+                    next_open.push(cell, g[cell] + next_weight * cell_h)
+            path, cost = self.path, grid.path_cost(self.path)
+            self.pending = self.path = self.next_open = None
+            bound = max(1.0, min(weight, cost / lower)) if lower > 0 else 1.0  # lower is 0 only when start is the end
+            if bound == 1.0:  # always the case after the round with weight 1, plain A* with an admissible heuristic
+                self.done = True
+            best = self.result
+            if best is None or cost < best.cost or bound < best.bound:
+                self.result = AnytimeResult([grid.position(cell) for cell in path], cost, self.expanded, bound, weight)
+                yield self.result
+            if self.done:
+                return
+            # next round: a smaller weight, everything open or inconsistent was queued again with its new key
+            self.weight = next_weight
+            self.open_set = next_open
+
+def ara_star(grid, start, end, observer=None, queue='lazy', heuristic=None, stats=None, weight=3.0, step=0.5,
+             seconds=None, expansions=None):  # one-shot use: the best path found within the budget, optimal without one
+    if stats is not None:
+        stats.begin()
+    planner = AnytimeAStar(grid, start, end, weight, step, queue, heuristic)
+    if stats is not None:
+        stats.phase('setup')
+    improvements = sum(1 for _ in planner.improve(seconds, expansions, observer))
+    result = planner.result
+    if planner.cancelled or result is None:
+        return stop_search(planner.expanded, stats, cancelled=planner.cancelled)
+    if observer is not None:
+        observer.found([grid.index(*position) for position in result.path])
+    result.expanded = planner.expanded
+    if stats is not None:
+        stats.phase('expansion')
+        stats.count(expanded=planner.expanded, path_length=len(result.path), improvements=improvements)
+        result.stats = stats
+    return result
@@ -1,7 +1,8 @@
-import pygame
 import math
-from queue import PriorityQueue
-from utils import reconstruct_path, print_path
+from grid import SQRT2
+from dijkstra import bidirectional_dijkstra
+from priority_queue import make_queue
+from utils import reconstruct_path, finish_search, stop_search
 
 # calculates the distance between two points (Manhattan distance)
 def heuristic(point1, point2):
@@ -9,57 +10,81 @@ def heuristic(point1, point2):
     x2,  y2 = point2
     return abs(x1 - x2) + abs(y1 - y2)
 
-def astar(draw, grid, start, end):
-    #print("Hello astar")
-    count = 0
-    open_set = PriorityQueue() # priority queue to hold nodes to explore
-    open_set.put((0, count, start)) # start with the initial node
-    came_from = {}  # dictionary to store the path from start to current node
+# distance when diagonal steps are allowed and cost sqrt(2) (octile distance)
+def octile(point1, point2):
+    dx = abs(point1[0] - point2[0])
+    dy = abs(point1[1] - point2[1])
+    return dx + dy + (SQRT2 - 2) * min(dx, dy)
+
+# straight-line distance, admissible for both movement modes but less informed than the two above
+def euclidean(point1, point2):
+    return math.hypot(point1[0] - point2[0], point1[1] - point2[1])
 
-    # initialize the cost of reaching each node (g_score)
-    g_score = {node: float("inf") for row in grid for node in row}
-    g_score[start] = 0 # cost to reach the start node is zero
+HEURISTICS = {
+    'manhattan': heuristic,
+    'octile': octile,
+    'euclidean': euclidean,
+}
 
-    # initialize the estimated total cost (f_score) for each node
-    f_score = {node: float("inf") for row in grid for node in row}
-    f_score[start] = heuristic(start.get_position(), end.get_position())
+# every cell costs at least 1 to enter, so the unit-cost distance for the grid's movement mode stays admissible
+def grid_heuristic(grid, name=None):
+    if name is None:
+        name = 'octile' if grid.diagonal else 'manhattan'
+    return HEURISTICS[name]
 
-    open_set_hash = {start} # set to keep track of nodes in the open set
+def astar(grid, start, end, observer=None, queue='lazy', heuristic=None, stats=None):
+    if stats is not None:
+        stats.begin()
+    #print("Hello astar")
+    goal = end
+    estimate = grid_heuristic(grid, heuristic) # heuristic names one of HEURISTICS, by default it follows the grid
+    start = grid.index(*start)
+    end = grid.index(*end)
+    open_set = make_queue(queue) # priority queue of nodes to explore, ordered by f_score
+    open_set.push(start, estimate(grid.position(start), goal)) # start with the initial node
+    came_from = {}  # dictionary to store the path from start to current node
 
-    while not open_set.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return False
-            
-        current_node  = open_set.get()[2] # get the node with the lowest f_score
-        open_set_hash.remove(current_node) # remove the node from the open set
+    # cost of reaching each node (g_score), filled in lazily: a missing entry means infinity,
+    # so a query that only touches a small region never pays for the whole grid
+    g_score = {start: 0} # cost to reach the start node is zero
+    inf = float("inf")
+    expanded = 0
+    if stats is not None:
+        stats.phase('setup')
+
+    while open_set:
+        current_node = open_set.pop()[0] # get the node with the lowest f_score
+        expanded += 1
 
         if current_node == end: # if the current node is the end node, reconstruct the path
-            path = reconstruct_path(came_from, end, start, draw)
-            end.make_end()
-            start.make_start()
-            print_path(path)
-            draw()
-            return True
+            if stats is not None:
+                stats.phase('expansion')
+            path = reconstruct_path(came_from, end, start)
+            return finish_search(grid, path, g_score[end], expanded, observer, stats, (open_set,))
         
-        for neighbor in current_node.neighbors: # explre the neighbors of the current node
-            temp_g_score = g_score[current_node] + 1 # compute the temporary g_score for the neighbor
-            if temp_g_score < g_score[neighbor]: # if the new path to the neighbor is shorter, update its scores
+        for neighbor, step_cost in grid.edges(current_node): # explre the neighbors of the current node
+            temp_g_score = g_score[current_node] + step_cost # compute the temporary g_score for the neighbor
+            if temp_g_score < g_score.get(neighbor, inf): # if the new path to the neighbor is shorter, update its scores
                 came_from[neighbor] = current_node # record where the neighbor came from
                 g_score[neighbor] = temp_g_score # update the cost to reach the neighbor
-                f_score[neighbor] = temp_g_score + heuristic(neighbor.get_position(), end.get_position())  # update the estimated total cost to reach the end node
-
-                # if the neighbor is not already in the open set, add it for exploration
-                if neighbor not in open_set_hash:
-                    count += 1
-                    open_set.put((f_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-                    neighbor.make_open()
+                # push the neighbor with its estimated total cost to reach the end node (decrease-key if already queued)
+                open_set.push(neighbor, temp_g_score + estimate(grid.position(neighbor), goal))
+                if observer is not None:
+                    observer.opened(neighbor)
 
-        draw()
-
-        if current_node != start:
-            current_node.make_closed(g_score[current_node]) # mark processed nodes as closed
+        if observer is not None:
+            if current_node != start:
+                observer.closed(current_node, g_score[current_node]) # mark processed nodes as closed
+            if not observer.step():
+                return stop_search(expanded, stats, (open_set,), cancelled=True)
     
-    return False
+    return stop_search(expanded, stats, (open_set,))
+
+def bidirectional_astar(grid, start, end, observer=None, queue='lazy', heuristic=None, stats=None):
+    # bidirectional A* with the average of the two heuristics as potential, which stays consistent
+    # for both directions so the meeting point is provably optimal
+    estimate = grid_heuristic(grid, heuristic)
+    def potential(cell):
+        position = grid.position(cell)
+        return (estimate(position, end) - estimate(position, start)) / 2
+    return bidirectional_dijkstra(grid, start, end, observer, queue, potential, stats)
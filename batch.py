@@ -0,0 +1,89 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+import search
+
+# runs many start/end queries on one map across a pool of worker processes. The map is copied once into
+# shared memory and every worker wraps that buffer in its own read-only Grid, so nothing per query is
+# pickled except the query itself and its result.
+
+class SharedGrid:  # a copy of the cells of a grid in shared memory, owned by the process that created it
+    def __init__(self, grid):
+        self.memory = shared_memory.SharedMemory(create=True, size=max(1, grid.nbytes))
+        np.ndarray(grid.cells.shape, dtype=np.uint8, buffer=self.memory.buf)[:] = grid.cells
+        self.spec = (self.memory.name, type(grid), grid.rows, grid.cols, grid.diagonal)  # what attach_grid needs
+
+    def close(self):  # frees the block, once the workers using it are gone
+        self.memory.close()
+        self.memory.unlink()
+
+def share_grid(grid):
+    return SharedGrid(grid)
+
+_attached = []  # shared blocks mapped in this process
+
+def attach_grid(spec):  # a read-only Grid over the block of a SharedGrid, from its spec, in a worker process
+    name, grid_class, rows, cols, diagonal = spec
+    # workers share the parent's resource tracker, which already knows the block and unlinks it with the parent
+    memory = shared_memory.SharedMemory(name=name)
+    cells = np.ndarray((rows, cols), dtype=np.uint8, buffer=memory.buf)
+    cells.flags.writeable = False
+    _attached.append(memory)  # keep the mapping alive as long as the worker
+    return grid_class(rows, cols, cells, diagonal)
+
+_worker_grid = None  # the shared map, attached once in each worker process
+
+def _attach(spec):
+    global _worker_grid
+    _worker_grid = attach_grid(spec)
+
+def _run_chunk(algorithm, chunk, options):
+    begin = time.perf_counter()
+    results = [(index, search.find_path(_worker_grid, start, end, algorithm, **options)) for index, start, end in chunk]
+    return os.getpid(), time.perf_counter() - begin, results
+
+
+class BatchStats:  # per worker process: queries answered and seconds spent searching
+    def __init__(self):
+        self.queries = {}
+        self.busy = {}
+        self.begin = time.perf_counter()
+
+    def add(self, worker, queries, seconds):
+        self.queries[worker] = self.queries.get(worker, 0) + queries
+        self.busy[worker] = self.busy.get(worker, 0) + seconds
+
+    def report(self):
+        elapsed = time.perf_counter() - self.begin
+        total = sum(self.queries.values())
+        lines = [f"{total} queries in {elapsed:.2f} s, {total / elapsed:.0f} queries/s overall"]
+        for worker in sorted(self.queries):
+            lines.append(f"  worker {worker}: {self.queries[worker]} queries, {self.queries[worker] / self.busy[worker]:.0f} queries/s while busy")
+        return "\n".join(lines)
+
+
+def run_batch(grid, queries, algorithm='astar', workers=None, chunk_size=64, stats=None, **options):
+    # yields (position of the query in queries, SearchResult) as chunks complete, in no particular order.
+    # queries is a list of (start, end) pairs, options are passed on to the solver, and a BatchStats given
+    # as stats is updated after every chunk
+    if algorithm not in search.ALGORITHMS:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {', '.join(search.ALGORITHMS)}")
+    shared = share_grid(grid)
+    try:
+        chunks = [[(index, start, end) for index, (start, end) in enumerate(queries[first:first + chunk_size], first)]
+                  for first in range(0, len(queries), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(shared.spec,)) as pool:
+            pending = [pool.submit(_run_chunk, algorithm, chunk, options) for chunk in chunks]
+            try:
+                for future in as_completed(pending):
+                    worker, seconds, results = future.result()
+                    if stats is not None:
+                        stats.add(worker, len(results), seconds)
+                    yield from results
+            finally:  # the caller may stop iterating early, do not run the chunks nobody will read
+                for future in pending:
+                    future.cancel()
+    finally:
+        shared.close()
@@ -0,0 +1,375 @@
+# headless benchmarks, run with `python benchmark.py <name>`
+import argparse
+import csv
+import json
+import numpy as np
+import time
+import tracemalloc
+from grid import Grid, WALL, FREE
+import astar
+import ara
+import bounded
+import bfs
+import cooperative
+import dfs
+import dijkstra
+import jps
+import hpa
+import maps
+import dstar
+import batch
+import distance_cache
+import ucs
+from utils import SearchObserver
+
+def bench_grid(sizes=(50, 500, 5000)):  # memory and construction time of the grid model
+    print(f"{'rows':>6} {'cells':>12} {'build ms':>10} {'memory MB':>10}")
+    for rows in sizes:
+        tracemalloc.start()
+        begin = time.perf_counter()
+        grid = Grid(rows)
+        elapsed = time.perf_counter() - begin
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{rows:>6} {grid.size:>12} {elapsed * 1000:>10.2f} {peak / 1e6:>10.2f}")
+
+def bench_bfs(sizes=(250, 500, 1000)):  # expansion rate of BFS/DFS on open grids, should stay flat as size grows
+    print(f"{'solver':>6} {'rows':>6} {'expanded':>10} {'seconds':>8} {'exp/s':>10}")
+    for solver in (bfs.bfs, dfs.dfs):
+        for rows in sizes:
+            grid = Grid(rows)
+            begin = time.perf_counter()
+            result = solver(grid, (0, 0), (rows - 1, rows - 1))
+            elapsed = time.perf_counter() - begin
+            print(f"{solver.__name__:>6} {rows:>6} {result.expanded:>10} {elapsed:>8.3f} {result.expanded / elapsed:>10.0f}")
+
+def bench_queue(rows=300):  # per-expansion overhead of the two priority queues, and setup cost on a huge map
+    print(f"{'solver':>9} {'queue':>8} {'expanded':>10} {'us/exp':>8}")
+    grid = Grid(rows)
+    for solver in (astar.astar, dijkstra.dijkstra, ucs.ucs):
+        for queue in ('lazy', 'indexed'):
+            begin = time.perf_counter()
+            result = solver(grid, (0, 0), (rows - 1, rows - 1), queue=queue)
+            elapsed = time.perf_counter() - begin
+            print(f"{solver.__name__:>9} {queue:>8} {result.expanded:>10} {elapsed / result.expanded * 1e6:>8.2f}")
+    huge = Grid(5000)
+    begin = time.perf_counter()
+    astar.astar(huge, (2500, 2500), (2510, 2510))
+    print(f"short A* query on a 5000x5000 grid: {(time.perf_counter() - begin) * 1000:.2f} ms")
+
+def bench_jps(rows=256):  # Jump Point Search against plain A* on the same maps and queries
+    print(f"{'map':>8} {'diagonal':>8} {'solver':>6} {'cost':>9} {'expanded':>9} {'ms':>9}")
+    for family in ('open', 'maze', 'random'):
+        for diagonal in (False, True):
+            grid = maps.MAP_FAMILIES[family](rows)
+            grid.diagonal = diagonal
+            start, end = maps.corner_query(grid)
+            for solver in (astar.astar, jps.jps):
+                begin = time.perf_counter()
+                result = solver(grid, start, end)
+                elapsed = time.perf_counter() - begin
+                cost = f"{result.cost:.2f}" if result.found else "-"
+                print(f"{family:>8} {str(diagonal):>8} {solver.__name__:>6} {cost:>9} {result.expanded:>9} {elapsed * 1000:>9.1f}")
+
+def bench_bidirectional(rows=400):  # explored area of the bidirectional variants on a long query away from the map edges
+    print(f"{'solver':>24} {'cost':>9} {'expanded':>9} {'ms':>9}")
+    grid = maps.random_map(rows, density=0.2)
+    start, end = (rows // 4, rows // 2), (3 * rows // 4, rows // 2)
+    grid.set_wall(*start, False)
+    grid.set_wall(*end, False)
+    for solver in (bfs.bfs, bfs.bidirectional_bfs, dijkstra.dijkstra, dijkstra.bidirectional_dijkstra,
+                   astar.astar, astar.bidirectional_astar):
+        begin = time.perf_counter()
+        result = solver(grid, start, end)
+        elapsed = time.perf_counter() - begin
+        cost = f"{result.cost:.2f}" if result.found else "-"
+        print(f"{solver.__name__:>24} {cost:>9} {result.expanded:>9} {elapsed * 1000:>9.1f}")
+
+def bench_hpa(rows=512, queries=50):  # HPA* query latency and path quality against A* on a static map
+    grid = maps.random_map(rows, density=0.2)
+    begin = time.perf_counter()
+    index = hpa.build_index(grid)
+    print(f"index built in {time.perf_counter() - begin:.2f} s, {len(index.edges)} abstract nodes")
+    hpa_time = astar_time = 0
+    ratios = []
+    for start, end in maps.random_queries(grid, queries):
+        begin = time.perf_counter()
+        fast = index.find_path(start, end)
+        hpa_time += time.perf_counter() - begin
+        begin = time.perf_counter()
+        exact = astar.astar(grid, start, end)
+        astar_time += time.perf_counter() - begin
+        if exact.found and exact.cost:
+            ratios.append(fast.cost / exact.cost)
+    print(f"mean query: HPA* {hpa_time / queries * 1000:.1f} ms, A* {astar_time / queries * 1000:.1f} ms")
+    print(f"path cost / optimal: mean {sum(ratios) / len(ratios):.3f}, worst {max(ratios):.3f}")
+
+def bench_dstar(rows=200, rounds=20, seed=0):  # D* Lite repairs against a new A* search after a few cells change
+    grid = maps.random_map(rows, density=0.2, seed=seed)
+    start, end = maps.corner_query(grid)
+    planner = dstar.DStarLite(grid, start, end)
+    begin = time.perf_counter()
+    result = planner.plan()
+    print(f"initial D* Lite plan: {(time.perf_counter() - begin) * 1000:.1f} ms, {result.expanded} expansions")
+    rng = np.random.default_rng(seed)
+    repair_time = replan_time = 0
+    for done in range(1, rounds + 1):
+        cells = []
+        for _ in range(3):  # block cells on the current path, so every edit forces a repair
+            row, col = result.path[rng.integers(1, len(result.path) - 1)]
+            grid.set_wall(row, col)
+            cells.append((row, col))
+        begin = time.perf_counter()
+        planner.update_cells(cells)
+        result = planner.plan()
+        repair_time += time.perf_counter() - begin
+        begin = time.perf_counter()
+        astar.astar(grid, start, end)
+        replan_time += time.perf_counter() - begin
+        if not result.found:
+            break
+    print(f"mean over {done} edits: D* Lite repair {repair_time / done * 1000:.1f} ms, new A* search {replan_time / done * 1000:.1f} ms")
+
+def bench_batch(rows=256, queries=2000):  # throughput of the process-pool batch API
+    grid = maps.random_map(rows, density=0.2)
+    stats = batch.BatchStats()
+    found = sum(result.found for _, result in batch.run_batch(grid, maps.random_queries(grid, queries), 'astar', stats=stats))
+    print(stats.report())
+    print(f"{found} of {queries} queries had a path")
+
+def bench_wavefront(rows=500):  # full distance field: vectorized wavefront against the per-node bfs loop
+    print(f"{'map':>8} {'reached':>9} {'bfs ms':>9} {'field ms':>9} {'speedup':>8}")
+    for family in ('open', 'random', 'rooms', 'maze'):
+        grid = maps.MAP_FAMILIES[family](rows)
+        start = maps.corner_query(grid)[0]
+        begin = time.perf_counter()
+        field = bfs.distance_field(grid, start)
+        field_time = time.perf_counter() - begin
+        farthest = np.unravel_index(int(field.argmax()), field.shape)  # bfs to it explores nearly the whole map
+        begin = time.perf_counter()
+        bfs.bfs(grid, start, farthest)
+        bfs_time = time.perf_counter() - begin
+        print(f"{family:>8} {int((field >= 0).sum()):>9} {bfs_time * 1000:>9.1f} {field_time * 1000:>9.1f} {bfs_time / field_time:>8.1f}")
+
+def bench_cache(rows=256, agents=300, goals=3, seed=0):  # many agents converging on a few goals: one A* each against cached fields
+    grid = maps.random_map(rows, density=0.2, seed=seed)
+    targets = [end for _, end in maps.random_queries(grid, goals, seed)]
+    rng = np.random.default_rng(seed)
+    queries = [(start, targets[rng.integers(goals)]) for start, _ in maps.random_queries(grid, agents, seed + 1)]
+    for diagonal in (False, True):
+        grid.diagonal = diagonal
+        begin = time.perf_counter()
+        for start, end in queries:
+            astar.astar(grid, start, end)
+        astar_time = time.perf_counter() - begin
+        cache = distance_cache.DistanceFieldCache(grid)
+        begin = time.perf_counter()
+        for start, end in queries:
+            cache.find_path(start, end)
+        cache_time = time.perf_counter() - begin
+        print(f"diagonal={diagonal}: {agents} agents, {goals} goals: A* {astar_time:.2f} s, "
+              f"cache {cache_time:.2f} s ({cache.misses} fields, {cache.nbytes / 1e6:.1f} MB)")
+
+def bench_neighbors(rows=600, paints=10000, repeats=3):  # on-the-fly neighbors against precomputed bitmasks, and what the masks cost
+    print(f"{'diagonal':>8} {'solver':>6} {'lazy ms':>9} {'masks ms':>9}")
+    grid = maps.random_map(rows, density=0.2)
+    start, end = maps.corner_query(grid)
+    masked = grid.copy()
+    begin = time.perf_counter()
+    masked.precompute_neighbors()
+    build_time = time.perf_counter() - begin
+    for diagonal in (False, True):
+        grid.diagonal = masked.diagonal = diagonal
+        for solver in (bfs.bfs, astar.astar, dijkstra.dijkstra):
+            times = [float("inf")] * 2
+            for _ in range(repeats):  # best of a few runs, alternating so both see the same machine state
+                for i, candidate in enumerate((grid, masked)):
+                    begin = time.perf_counter()
+                    solver(candidate, start, end)
+                    times[i] = min(times[i], time.perf_counter() - begin)
+            print(f"{str(diagonal):>8} {solver.__name__:>6} {times[0] * 1000:>9.1f} {times[1] * 1000:>9.1f}")
+    cells = np.random.default_rng(0).integers(grid.size, size=paints).tolist()
+    begin = time.perf_counter()
+    for cell in cells:
+        masked.set_cost(*masked.position(cell), WALL if masked.flat[cell] else FREE)
+    paint_time = time.perf_counter() - begin
+    print(f"masks: {build_time * 1000:.1f} ms to build, {masked.masks.nbytes / 1e6:.1f} MB, "
+          f"{paint_time / paints * 1e6:.1f} us per painted cell")
+
+def bench_anytime(rows=500, budgets=(0.01, 0.05, 0.25, 1.0)):  # quality of the ARA* path under a deadline, against full A*
+    print(f"{'map':>8} {'budget ms':>9} {'cost':>9} {'/optimal':>8} {'bound':>6}")
+    for family in ('open', 'random', 'rooms', 'maze'):
+        grid = maps.MAP_FAMILIES[family](rows)
+        grid.diagonal = True
+        start, end = maps.corner_query(grid)
+        begin = time.perf_counter()
+        optimal = astar.astar(grid, start, end)
+        print(f"{family:>8} {'A*':>9} {optimal.cost:>9.1f} {1:>8.3f} {'':>6} ({(time.perf_counter() - begin) * 1000:.0f} ms)")
+        for budget in budgets:
+            result = ara.ara_star(grid, start, end, seconds=budget)
+            if result.found:
+                print(f"{family:>8} {budget * 1000:>9.0f} {result.cost:>9.1f} {result.cost / optimal.cost:>8.3f} {result.bound:>6.3f}")
+            else:
+                print(f"{family:>8} {budget * 1000:>9.0f} {'-':>9}")
+
+def bench_bounded(rows=128, queries=3, seed=0, max_expansions=100000):
+    # peak memory against runtime: A* keeps everything it reached, IDA* the current path and its table,
+    # SMA* at most max_nodes nodes; tracemalloc slows every solver down by about the same factor
+    print(f"{'map':>8} {'solver':>16} {'found':>6} {'optimal':>7} {'ms':>9} {'expanded':>9} {'peak KB':>8}")
+    solvers = [('A*', astar.astar), ('IDA* no table', lambda *query: bounded.ida_star(*query, table_size=0))]
+    for size in (1024, 8192):
+        solvers.append((f"IDA* table {size}", lambda *query, size=size: bounded.ida_star(*query, table_size=size)))
+    for size in (512, 2048, 8192):
+        solvers.append((f"SMA* {size}", lambda *query, size=size: bounded.sma_star(*query, max_nodes=size)))
+    for family in ('random', 'rooms', 'maze'):
+        grid = maps.MAP_FAMILIES[family](rows, seed=seed)
+        pairs = maps.random_queries(grid, queries, seed)
+        optimal = [astar.astar(grid, start, end).cost for start, end in pairs]
+        for name, solver in solvers:
+            found = exact = expanded = peak = 0
+            elapsed = 0
+            for (start, end), cost in zip(pairs, optimal):
+                tracemalloc.start()
+                begin = time.perf_counter()
+                result = solver(grid, start, end, ExpansionLimit(max_expansions))  # stops searches that run away
+                elapsed += time.perf_counter() - begin
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                found += result.found
+                exact += result.found and abs(result.cost - cost) < 1e-9
+                expanded += result.expanded
+            print(f"{family:>8} {name:>16} {found:>6} {exact:>7} {elapsed / queries * 1000:>9.1f} "
+                  f"{expanded // queries:>9} {peak / 1024:>8.0f}")
+
+def bench_agents(rows=128, counts=(50, 100, 200, 400), seed=0):
+    # cooperative planning of many agents at once: the time per agent should stay about flat as agents are added,
+    # compared with one A* per agent that ignores the others; steps/A* is how much longer the shared paths are
+    print(f"{'map':>8} {'agents':>7} {'arrived':>8} {'ms/agent':>9} {'slowest':>8} {'A* ms':>7} {'makespan':>9} "
+          f"{'steps/A*':>9} {'conflicts':>9}")
+    for family in ('open', 'random', 'rooms'):
+        grid = maps.MAP_FAMILIES[family](rows, seed=seed)
+        for count in counts:
+            queries = maps.agent_queries(grid, count, seed)
+            begin = time.perf_counter()
+            alone = [astar.astar(grid, start, goal) for start, goal in queries]
+            astar_time = time.perf_counter() - begin
+            agents = cooperative.cooperative_astar(grid, queries)
+            arrived = [(agent, result) for agent, result in zip(agents, alone) if agent.arrived is not None]
+            ratio = sum(agent.steps for agent, _ in arrived) / max(1, sum(len(result.path) - 1 for _, result in arrived))
+            seconds = [agent.seconds for agent in agents]
+            print(f"{family:>8} {count:>7} {len(arrived):>8} {sum(seconds) / count * 1000:>9.2f} {max(seconds) * 1000:>8.1f} "
+                  f"{astar_time / count * 1000:>7.2f} {max((agent.arrived for agent, _ in arrived), default=0):>9} "
+                  f"{ratio:>9.3f} {len(cooperative.collisions(agents)):>9}")
+
+class FrontierObserver(SearchObserver):  # largest number of distinct cells on the frontier at once
+    def __init__(self):
+        self.frontier = set()
+        self.peak = 0
+
+    def opened(self, cell, backward=False):
+        self.frontier.add(cell)
+        self.peak = max(self.peak, len(self.frontier))
+
+    def closed(self, cell, cost, backward=False):
+        self.frontier.discard(cell)
+
+class ExpansionLimit(SearchObserver):  # cancels a search after a number of expansions
+    def __init__(self, limit):
+        self.left = limit
+
+    def step(self):
+        self.left -= 1
+        return self.left > 0
+
+
+SUITE_SOLVERS = (astar.astar, bfs.bfs, dfs.dfs, dijkstra.dijkstra, ucs.ucs)
+SUITE_MAPS = (  # name, generator and its options
+    ('open', maps.open_map, {}),
+    ('random-10', maps.random_map, {'density': 0.1}),
+    ('random-20', maps.random_map, {'density': 0.2}),
+    ('random-30', maps.random_map, {'density': 0.3}),
+    ('maze', maps.maze_map, {}),
+    ('rooms', maps.rooms_map, {}),
+)
+SUITE_FIELDS = ['map', 'rows', 'solver', 'queries', 'found', 'mean_ms', 'mean_expanded',
+                'peak_frontier', 'peak_memory_kb', 'mean_cost_ratio', 'worst_cost_ratio']
+
+def bench_suite(sizes=(64, 128), queries=10, seed=0, output=None):
+    # every solver on every map family and size with the same seeded queries; each query is run three times:
+    # timed with no observer, under tracemalloc for the peak memory, and with an observer for the frontier size.
+    # cost ratios compare with the Dijkstra cost of the same query, 1.0 means optimal
+    rows_out = []
+    print(f"{'map':>10} {'rows':>5} {'solver':>9} {'found':>6} {'ms':>8} {'expanded':>9} {'frontier':>9} {'KB':>8} {'cost/opt':>9}")
+    for name, generator, options in SUITE_MAPS:
+        for rows in sizes:
+            grid = generator(rows, seed=seed, **options)
+            query_set = maps.random_queries(grid, queries, seed)
+            optimal = [dijkstra.dijkstra(grid, start, end).cost for start, end in query_set]
+            for solver in SUITE_SOLVERS:
+                elapsed = expanded = found = frontier = memory = 0
+                ratios = []
+                for (start, end), best in zip(query_set, optimal):
+                    begin = time.perf_counter()
+                    result = solver(grid, start, end)
+                    elapsed += time.perf_counter() - begin
+                    expanded += result.expanded
+                    if result.found:
+                        found += 1
+                        ratios.append(result.cost / best if best else 1.0)
+                    tracemalloc.start()
+                    solver(grid, start, end)
+                    memory = max(memory, tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                    observer = FrontierObserver()
+                    solver(grid, start, end, observer)
+                    frontier = max(frontier, observer.peak)
+                row = {'map': name, 'rows': rows, 'solver': solver.__name__, 'queries': queries, 'found': found,
+                       'mean_ms': round(elapsed / queries * 1000, 3), 'mean_expanded': round(expanded / queries, 1),
+                       'peak_frontier': frontier, 'peak_memory_kb': round(memory / 1024, 1),
+                       'mean_cost_ratio': round(sum(ratios) / len(ratios), 4) if ratios else None,
+                       'worst_cost_ratio': round(max(ratios), 4) if ratios else None}
+                rows_out.append(row)
+                ratio = "-" if row['mean_cost_ratio'] is None else f"{row['mean_cost_ratio']:.3f}"
+                print(f"{name:>10} {rows:>5} {row['solver']:>9} {found:>6} {row['mean_ms']:>8.2f} {row['mean_expanded']:>9.0f} "
+                      f"{frontier:>9} {row['peak_memory_kb']:>8.0f} {ratio:>9}")
+    if output:
+        with open(output, 'w', newline='') as file:
+            if output.endswith('.json'):
+                json.dump(rows_out, file, indent=2)
+            else:
+                writer = csv.DictWriter(file, fieldnames=SUITE_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows_out)
+    return rows_out
+
+BENCHMARKS = {
+    'grid': bench_grid,
+    'bfs': bench_bfs,
+    'queue': bench_queue,
+    'jps': bench_jps,
+    'bidirectional': bench_bidirectional,
+    'hpa': bench_hpa,
+    'dstar': bench_dstar,
+    'batch': bench_batch,
+    'wavefront': bench_wavefront,
+    'cache': bench_cache,
+    'neighbors': bench_neighbors,
+    'anytime': bench_anytime,
+    'bounded': bench_bounded,
+    'agents': bench_agents,
+    'suite': bench_suite,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the search visualizer")
+    parser.add_argument('name', choices=BENCHMARKS, help="benchmark to run")
+    parser.add_argument('--sizes', type=int, nargs='+', help="suite: map sizes in rows")
+    parser.add_argument('--queries', type=int, help="suite: queries per map")
+    parser.add_argument('--seed', type=int, help="suite: seed of the maps and queries")
+    parser.add_argument('--output', help="suite: also write the results to this .csv or .json file")
+    args = parser.parse_args()
+    options = {key: value for key, value in (('sizes', args.sizes), ('queries', args.queries), ('seed', args.seed),
+                                               ('output', args.output)) if value is not None}
+    if options and args.name != 'suite':
+        parser.error("--sizes, --queries, --seed and --output only apply to the suite benchmark")
+    BENCHMARKS[args.name](**options)
@@ -1,40 +1,203 @@
-import pygame
-from utils import reconstruct_path, print_path
+from collections import deque
+import numpy as np
+from utils import reconstruct_path, join_paths, finish_search, stop_search
 
-def bfs(draw, grid, start, end):
-    visited = [] # list to keep track of visited nodes
-    queue = [] # initialize a queue for BFS
+def bfs(grid, start, end, observer=None, stats=None):
+    if stats is not None:
+        stats.begin()
+    start = grid.index(*start)
+    end = grid.index(*end)
+    visited = bytearray(grid.size) # one byte per cell marks visited nodes, so membership checks are O(1)
+    queue = deque() # initialize a queue for BFS, popleft is O(1) unlike list.pop(0)
     queue.append(start) # add the start node to the queue
-    visited.append(start) # mark the start node as visited
+    visited[start] = 1 # mark the start node as visited
     came_from = {}  # dictionary to store the path from start to current node
     distance_from_start = {start: 0}  # dictionary to track distances from the start node
+    expanded = 0
+    if stats is not None:
+        stats.phase('setup')
 
     while queue: # loop to visit each node
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return False
-            
-        current_node = queue.pop(0) # dequeue the first node in the queue
+        current_node = queue.popleft() # dequeue the first node in the queue
+        expanded += 1
 
         if current_node == end: # if the current node is the end node, return the path
-            path = reconstruct_path(came_from, end, start, draw)
-            end.make_end()
-            start.make_start()
-            print_path(path)
-            draw()
-            return True
+            if stats is not None:
+                stats.phase('expansion')
+            path = reconstruct_path(came_from, end, start)
+            return finish_search(grid, path, grid.path_cost(path), expanded, observer, stats) # BFS ignores terrain, the cost is what the path really costs
         
-        for neighbor in current_node.neighbors: # explore the neighbors of the current node
-            if neighbor not in visited : # if the neighbor hasn't been visited
-                visited.append(neighbor) # mark it as visited
+        for neighbor in grid.neighbors(current_node): # explore the neighbors of the current node
+            if not visited[neighbor]: # if the neighbor hasn't been visited
+                visited[neighbor] = 1 # mark it as visited
                 came_from[neighbor] = current_node 
                 queue.append(neighbor)
-                neighbor.make_open()
                 distance_from_start[neighbor] = distance_from_start[current_node] + 1 # update distance from start for the neighbor
-        draw()
+                if observer is not None:
+                    observer.opened(neighbor)
 
-        if current_node != start:
-            current_node.make_closed(distance_from_start[current_node])  # mark processed nodes as closed
+        if observer is not None:
+            if current_node != start:
+                observer.closed(current_node, distance_from_start[current_node])  # mark processed nodes as closed
+            if not observer.step():
+                return stop_search(expanded, stats, cancelled=True)
 
-    return False
\ No newline at end of file
+    return stop_search(expanded, stats)
+
+def bidirectional_bfs(grid, start, end, observer=None, stats=None):
+    if stats is not None:
+        stats.begin()
+    start = grid.index(*start)
+    end = grid.index(*end)
+    if start == end:
+        return finish_search(grid, [start], 0, 0, observer, stats)
+    if not grid.flat[end]:  # nothing can step into a barrier, do not grow a frontier out of it
+        if stats is not None:
+            stats.phase('setup')
+        return stop_search(0, stats)
+    distance = ({start: 0}, {end: 0}) # steps from the start and from the end, also the visited markers of each side
+    came_from = ({}, {})
+    frontier = ([start], [end]) # the current layer of each side
+    expanded = 0
+    if stats is not None:
+        stats.phase('setup')
+
+    while frontier[0] and frontier[1]:
+        side = 0 if len(frontier[0]) <= len(frontier[1]) else 1 # grow the smaller frontier by one whole layer
+        mine, other = distance[side], distance[1 - side]
+        best = None # shortest connection seen in this layer as (length, cell on this side, cell on the other side)
+        next_layer = []
+        for current_node in frontier[side]:
+            expanded += 1
+            for neighbor in grid.neighbors(current_node):
+                if neighbor in other: # the frontiers touch
+                    length = mine[current_node] + 1 + other[neighbor]
+                    if best is None or length < best[0]:
+                        best = (length, current_node, neighbor)
+                if neighbor not in mine:
+                    mine[neighbor] = mine[current_node] + 1
+                    came_from[side][neighbor] = current_node
+                    next_layer.append(neighbor)
+                    if observer is not None:
+                        observer.opened(neighbor, backward=side == 1)
+            if observer is not None:
+                if current_node != start and current_node != end:
+                    observer.closed(current_node, mine[current_node], backward=side == 1)
+                if not observer.step():
+                    return stop_search(expanded, stats, cancelled=True)
+
+        # finishing the layer before stopping guarantees the shortest connection was seen
+        if best is not None:
+            if stats is not None:
+                stats.phase('expansion')
+            _, near, far = best
+            meet_forward, meet_backward = (near, far) if side == 0 else (far, near)
+            path = join_paths(came_from[0], came_from[1], meet_forward, meet_backward, start, end)
+            return finish_search(grid, path, grid.path_cost(path), expanded, observer, stats)
+        frontier = (next_layer, frontier[1]) if side == 0 else (frontier[0], next_layer)
+
+    return stop_search(expanded, stats)
+
+# wavefront BFS: instead of one node at a time, every step expands the whole frontier with array operations.
+# it fills a distance field (steps from the source to every cell, -1 where unreachable) and a path is found by
+# walking down the field from the end. Much faster than bfs() when most of the map gets explored, slower on
+# long one-cell corridors where the frontier stays tiny and every step pays the numpy call overhead, so
+# small frontiers are expanded cell by cell instead.
+SMALL_FRONTIER = 16
+
+def moves(grid):  # (flat offset, mask of the cells that can take that step) for every move grid.neighbors allows
+    rows, cols = grid.rows, grid.cols
+    free = grid.cells != 0
+    down = np.zeros((rows, cols), dtype=bool)
+    down[:-1] = free[1:]
+    up = np.zeros((rows, cols), dtype=bool)
+    up[1:] = free[:-1]
+    left = np.zeros((rows, cols), dtype=bool)
+    left[:, 1:] = free[:, :-1]
+    right = np.zeros((rows, cols), dtype=bool)
+    right[:, :-1] = free[:, 1:]
+    result = [(cols, down), (-cols, up), (-1, left), (1, right)]
+    if grid.diagonal:  # no corner cutting: both cells the move passes between must be free too
+        for d_row, d_col, first, second in ((1, -1, down, left), (1, 1, down, right), (-1, -1, up, left), (-1, 1, up, right)):
+            diagonal = np.zeros((rows, cols), dtype=bool)
+            rows_from = slice(max(0, -d_row), rows - max(0, d_row))
+            cols_from = slice(max(0, -d_col), cols - max(0, d_col))
+            rows_to = slice(max(0, d_row), rows - max(0, -d_row))
+            cols_to = slice(max(0, d_col), cols - max(0, -d_col))
+            diagonal[rows_from, cols_from] = free[rows_to, cols_to]
+            result.append((d_row * cols + d_col, diagonal & first & second))
+    return [(offset, mask.reshape(-1)) for offset, mask in result]
+
+def distance_field(grid, source, target=None):
+    # steps from source (row, col) to every cell as a (rows, cols) int32 array, -1 where unreachable.
+    # with a target the search stops at the layer that reaches it and the rest of the field stays -1
+    return _spread(grid, moves(grid), source, target)[0].reshape(grid.rows, grid.cols)
+
+def _spread(grid, steps, source, target=None, observer=None):  # the flat distance field, and whether the observer cancelled
+    distance = np.full(grid.size, -1, dtype=np.int32)
+    source = grid.index(*source)
+    target = None if target is None else grid.index(*target)
+    distance[source] = 0
+    frontier = np.array([source], dtype=np.intp)
+    level = 0
+    while frontier.size and (target is None or distance[target] < 0):
+        level += 1
+        previous = frontier
+        if frontier.size < SMALL_FRONTIER:
+            reached = []
+            for cell in frontier.tolist():
+                for neighbor in grid.neighbors(cell):
+                    if distance[neighbor] < 0:
+                        distance[neighbor] = level
+                        reached.append(neighbor)
+            frontier = np.array(reached, dtype=np.intp)
+        else:
+            reached = []
+            for offset, mask in steps:
+                cells = frontier[mask[frontier]] + offset
+                cells = cells[distance[cells] < 0]  # also drops cells an earlier direction reached in this layer
+                distance[cells] = level
+                reached.append(cells)
+            frontier = np.concatenate(reached)  # no duplicates: one move never maps two cells onto the same one
+        if observer is not None:
+            for cell in previous.tolist():
+                if cell != source:
+                    observer.closed(cell, level - 1)
+        if observer is not None:
+            for cell in frontier.tolist():
+                observer.opened(cell)
+            if not observer.step():
+                return distance, True
+    return distance, False
+
+def descend(grid, distance, end, steps=None):  # path of flat indices from the source of a distance field to end
+    flat = distance.reshape(-1)  # a view, the field may be flat or (rows, cols)
+    current = grid.index(*end)
+    if flat[current] < 0:
+        return []
+    steps = moves(grid) if steps is None else steps
+    path = [current]
+    while flat[current] > 0:
+        for offset, mask in steps:  # a predecessor one step closer that can move onto the current cell
+            previous = current - offset
+            if 0 <= previous < flat.size and mask[previous] and flat[previous] == flat[current] - 1:
+                current = previous
+                break
+        path.append(current)
+    path.reverse()
+    return path
+
+def wavefront_bfs(grid, start, end, observer=None, stats=None):  # same answer as bfs(), from the vectorized wavefront
+    if stats is not None:
+        stats.begin()
+    steps = moves(grid)
+    if stats is not None:
+        stats.phase('setup')
+    distance, cancelled = _spread(grid, steps, start, end, observer)
+    expanded = int((distance >= 0).sum())  # cells the wavefront reached
+    if cancelled or distance[grid.index(*end)] < 0:
+        return stop_search(expanded, stats, cancelled=cancelled)
+    if stats is not None:
+        stats.phase('expansion')
+    path = descend(grid, distance, end, steps)
+    return finish_search(grid, path, grid.path_cost(path), expanded, observer, stats)
@@ -0,0 +1,269 @@
+from heapq import heappush, heappop
+from astar import grid_heuristic
+from utils import finish_search, stop_search
+
+# memory-bounded search: both solvers keep a hard ceiling on what they store per query, whatever the size of
+# the map, and trade time for it. Plain tree search on a grid reaches the same cell along exponentially many
+# paths, so both keep a transposition table of at most table_size cells with the cheapest cost seen; a path
+# that reaches a cell no cheaper than a path already seen is pruned. table_size=0 gives the textbook versions.
+
+TABLE_SIZE = 1 << 16
+MAX_NODES = 1 << 16
+
+def ida_star(grid, start, end, observer=None, heuristic=None, stats=None, table_size=TABLE_SIZE, max_expansions=None):
+    # iterative deepening A*: depth-first searches bounded by f = g + h, raising the bound to the smallest f
+    # that went over it until the end is reached. Memory is the current path plus the table
+    if stats is not None:
+        stats.begin()
+    goal = end
+    estimate = grid_heuristic(grid, heuristic)
+    start = grid.index(*start)
+    end = grid.index(*end)
+    position = grid.position
+
+    def successors(cell):  # the most promising neighbor first, so the last iteration dives straight to the end
+        return iter(sorted(grid.edges(cell), key=lambda edge: edge[1] + estimate(position(edge[0]), goal)))
+
+    threshold = estimate(position(start), goal)
+    inf = float("inf")
+    expanded = 0
+    peak = 1  # most table entries plus path cells held at once
+
+    def counted(result):
+        if stats is not None:
+            stats.count(peak_nodes=peak)
+        return result
+
+    if stats is not None:
+        stats.phase('setup')
+    if start == end:
+        return counted(finish_search(grid, [start], 0, expanded, observer, stats))
+
+    while True:
+        best = {start: 0}  # the transposition table, only valid within one iteration
+        next_threshold = inf
+        path, costs, on_path = [start], [0], {start}
+        stack = [successors(start)]
+        while stack:
+            edge = next(stack[-1], None)
+            if edge is None:  # all neighbors tried, backtrack
+                stack.pop()
+                on_path.discard(path.pop())
+                costs.pop()
+                continue
+            neighbor, step_cost = edge
+            g = costs[-1] + step_cost
+            f = g + estimate(position(neighbor), goal)
+            if f > threshold:
+                next_threshold = min(next_threshold, f)
+                continue
+            if neighbor in on_path:
+                continue
+            known = best.get(neighbor)
+            if known is not None and known <= g:  # explored from there with at least as much budget left
+                continue
+            if known is not None or len(best) < table_size:
+                best[neighbor] = g
+            if neighbor == end:
+                path.append(end)
+                if stats is not None:
+                    stats.phase('expansion')
+                return counted(finish_search(grid, path, g, expanded, observer, stats))
+            expanded += 1
+            path.append(neighbor)
+            costs.append(g)
+            on_path.add(neighbor)
+            stack.append(successors(neighbor))
+            peak = max(peak, len(best) + len(path))
+            if observer is not None:
+                observer.closed(neighbor, g)
+                if not observer.step():
+                    return counted(stop_search(expanded, stats, cancelled=True))
+            if max_expansions is not None and expanded >= max_expansions:
+                return counted(stop_search(expanded, stats))
+        if next_threshold == inf:  # nothing was cut off, the end cannot be reached
+            return counted(stop_search(expanded, stats))
+        threshold = next_threshold
+
+
+class _Node:  # a node of the SMA* search tree; the same cell can have several, one per path kept in memory
+    __slots__ = ('cell', 'g', 'f', 'depth', 'parent', 'children', 'forgotten', 'pending', 'version')
+
+    def __init__(self, cell, g, f, depth, parent):
+        self.cell = cell
+        self.g = g
+        self.f = f
+        self.depth = depth
+        self.parent = parent
+        # both dicts are created when first needed, most nodes are leaves and never get them
+        self.children = None  # cell -> child node in memory
+        self.forgotten = None  # cell -> (f, g) of children dropped to make room, regenerated when needed again
+        self.pending = None  # (cell, g) of successors not generated yet, filled on the first expansion
+        self.version = 0  # bumped when the node is queued again, older heap entries are stale
+
+
+def sma_star(grid, start, end, observer=None, heuristic=None, stats=None, max_nodes=MAX_NODES, max_expansions=None):
+    # simplified memory-bounded A* (Russell): A* that generates one successor at a time and, once max_nodes nodes
+    # are in memory, drops the shallowest leaf with the highest f. Its parent remembers the best f below it, so
+    # the subtree is regenerated only if it becomes the most promising again. Optimal when the cheapest path
+    # fits in memory; max_nodes also caps the transposition table. Close to the limit it keeps dropping and
+    # regenerating the same subtrees, max_expansions bounds the time that can take
+    if stats is not None:
+        stats.begin()
+    goal = end
+    estimate = grid_heuristic(grid, heuristic)
+    start = grid.index(*start)
+    end = grid.index(*end)
+    inf = float("inf")
+    table = {}  # cell -> (cheapest g seen, the cell it was reached from)
+
+    def h(cell):
+        return estimate(grid.position(cell), goal)
+
+    def successors(node):
+        ancestors = set()
+        parent = node.parent
+        while parent is not None:
+            ancestors.add(parent.cell)
+            parent = parent.parent
+        result = []
+        for neighbor, step_cost in grid.edges(node.cell):
+            if neighbor in ancestors:
+                continue
+            g = node.g + step_cost
+            known = table.get(neighbor)
+            if known is not None and (known[0] < g or (known[0] == g and known[1] != node.cell)):
+                continue  # another path reaches the cell at least as cheaply
+            if (known is None and len(table) < max_nodes) or (known is not None and g < known[0]):
+                table[neighbor] = (g, node.cell)
+            result.append((neighbor, g))
+        result.sort(key=lambda item: item[1] + h(item[0]), reverse=True)  # pop() returns the most promising
+        return result
+
+    open_nodes = set()  # nodes with successors that are not in memory
+    best_heap = []  # (f, -depth, counter, version, node): the deepest node with the lowest f comes first
+    leaf_heap = []  # (-f, depth, counter, version, node): the shallowest leaf with the highest f comes first
+    counter = 0
+
+    def queue(node):
+        nonlocal counter
+        node.version += 1
+        counter += 1
+        heappush(best_heap, (node.f, -node.depth, counter, node.version, node))
+        heappush(leaf_heap, (-node.f, node.depth, counter, node.version, node))
+
+    def backup(node):  # a fully generated node is worth the best of its successors, passed up while it changes
+        while node is not None and node.pending == []:
+            f = min([child.f for child in (node.children or {}).values()] +
+                    [f for f, _ in (node.forgotten or {}).values()], default=inf)
+            if f <= node.f:
+                break
+            node.f = f
+            if node in open_nodes:
+                queue(node)
+            node = node.parent
+
+    def discard(node):  # drops a dead end (no successors at all) and the ancestors it leaves childless
+        nonlocal count
+        while node.parent is not None and node.pending == [] and not node.forgotten and not node.children:
+            open_nodes.discard(node)
+            count -= 1
+            parent = node.parent
+            del parent.children[node.cell]
+            backup(parent)
+            node = parent
+
+    def drop_leaf():  # makes room: forgets the shallowest leaf with the highest f, its parent keeps that f
+        nonlocal count, dropped
+        while leaf_heap:
+            _, _, _, version, node = heappop(leaf_heap)
+            if node in open_nodes and version == node.version and not node.children and node.parent is not None:
+                break
+        else:
+            return False
+        open_nodes.discard(node)
+        parent = node.parent
+        del parent.children[node.cell]
+        if parent.forgotten is None:
+            parent.forgotten = {}
+        parent.forgotten[node.cell] = (node.f, node.g)
+        count -= 1
+        dropped += 1
+        if parent not in open_nodes or not parent.children:  # has something to regenerate, and may be a leaf now
+            open_nodes.add(parent)
+            queue(parent)
+        return True
+
+    root = _Node(start, 0, h(start), 0, None)
+    open_nodes.add(root)
+    queue(root)
+    count = peak = 1
+    expanded = dropped = 0
+    if stats is not None:
+        stats.phase('setup')
+
+    while True:
+        while best_heap and (best_heap[0][4] not in open_nodes or best_heap[0][3] != best_heap[0][4].version):
+            heappop(best_heap)
+        if not best_heap or best_heap[0][0] == inf:  # no path, or none that fits in max_nodes nodes
+            result = stop_search(expanded, stats)
+            break
+        node = best_heap[0][4]
+        if node.cell == end:
+            path = []
+            while node is not None:
+                path.append(node.cell)
+                node = node.parent
+            path.reverse()
+            if stats is not None:
+                stats.phase('expansion')
+            result = finish_search(grid, path, best_heap[0][4].g, expanded, observer, stats)
+            break
+        if node.pending is None:
+            node.pending = successors(node)
+        if node.pending:
+            cell, g = node.pending.pop()
+            f = g + h(cell)
+        elif node.forgotten:  # what was learned about it before it was dropped still holds
+            cell = min(node.forgotten, key=node.forgotten.get)
+            f, g = node.forgotten.pop(cell)
+        else:
+            discard(node)  # no way out that is not covered by another path
+            open_nodes.discard(node)
+            continue
+        expanded += 1
+        depth = node.depth + 1
+        # a path longer than the memory cannot be kept, the node is worthless unless it is the end
+        f = max(node.f, f) if cell == end or depth < max_nodes - 1 else inf
+        child = _Node(cell, g, f, depth, node)
+        if node.children is None:
+            node.children = {}
+        node.children[cell] = child
+        if not node.pending and not node.forgotten:  # every successor is in memory
+            open_nodes.discard(node)
+            if observer is not None and node.cell != start:
+                observer.closed(node.cell, node.g)
+        backup(node)
+        if count >= max_nodes and not drop_leaf():
+            result = stop_search(expanded, stats)  # max_nodes is too small to hold even one path
+            break
+        open_nodes.add(child)
+        queue(child)
+        count += 1
+        peak = max(peak, count)
+        if len(best_heap) > 2 * len(open_nodes) + 64:  # stale entries must not break the memory ceiling
+            best_heap.clear()
+            leaf_heap.clear()
+            for queued in open_nodes:
+                queue(queued)
+        if observer is not None:
+            observer.opened(cell)
+            if not observer.step():
+                result = stop_search(expanded, stats, cancelled=True)
+                break
+        if max_expansions is not None and expanded >= max_expansions:
+            result = stop_search(expanded, stats)
+            break
+    if stats is not None:
+        stats.count(peak_nodes=peak, dropped=dropped)
+    return result
@@ -0,0 +1,277 @@
+import time
+from heapq import heappush, heappop
+import astar
+from astar import grid_heuristic
+
+# many agents on one map (cooperative A* with windowed replanning, Silver's WHCA*). Every agent first gets its
+# own A* path ignoring the others, the guide. Then, round after round, the agents plan one after the other
+# through space and time: a short A* over (cell, time step) states, window steps deep, that follows the guide
+# but may wait or step aside, and that may not enter a cell another agent already reserved for that time
+# step nor swap cells with one. Each agent then reserves the cells of its window, so the agents planning after
+# it avoid them. Only the first interval steps are carried out before everyone plans again, so an agent that
+# had to give way gets another chance every round. No search ever looks at more than its own window and the
+# reservations are a dict, so the work per agent does not depend on how many other agents there are.
+# Like every prioritized planner it is not complete: an agent parked on its goal at the end of a dead-end
+# corridor can keep another out forever, such agents simply have not arrived when max_steps runs out.
+
+WINDOW = 16  # time steps every agent plans ahead while avoiding the others
+MAX_RESTARTS = 4  # tries per round with agents that were boxed in planning first
+
+class Agent:  # one unit: where it starts and goes, the path it was given and what planning it cost
+    def __init__(self, start, goal):
+        self.start = start
+        self.goal = goal
+        self.path = [start]  # (row, col) at every time step, waits included; it stays on the last cell afterwards
+        self.guide = None  # flat cells of its A* path ignoring the other agents, empty if the goal cannot be reached
+        self.along = {}  # guide cell -> its position on the guide
+        self.left = []  # cost of the rest of the guide from each of its cells
+        self.progress = 0  # position on the guide of the last guide cell it stood on
+        self.strayed = False  # its last window started off the guide
+        self.guides = 0  # A* searches run for it, more than 1 when it was pushed far off its guide
+        self.expanded = 0  # nodes expanded by its A* and window searches
+        self.seconds = 0  # time spent planning for it
+        self.arrived = None  # time step from which it stays on its goal, None if it never got there
+
+    @property
+    def steps(self):
+        return len(self.path) - 1
+
+    def __repr__(self):
+        return f"Agent(start={self.start}, goal={self.goal}, steps={self.steps}, arrived={self.arrived})"
+
+
+class CooperativePlanner:
+    def __init__(self, grid, window=WINDOW, interval=None, heuristic=None, max_steps=None, clock=time.perf_counter):
+        self.grid = grid
+        self.window = window
+        self.interval = min(window, interval or max(1, window // 2))  # steps carried out before everyone plans again
+        self.heuristic = heuristic
+        self.estimate = grid_heuristic(grid, heuristic)
+        self.max_steps = max_steps  # by default 4 times the longest guide plus 4 windows
+        self.clock = clock  # what the planning time of every agent is measured with
+        self.agents = []
+        self.reserved = {}  # (time step, cell) -> number of the agent holding it, for the window being planned
+        self.starts = set()
+        self.goals = set()
+        self.time = 0
+        self.rounds = 0
+        self.restarts = 0  # rounds planned again because an agent was boxed in
+        self.cancelled = False
+
+    def add_agent(self, start, goal):
+        grid = self.grid
+        for row, col in (start, goal):
+            if not (0 <= row < grid.rows and 0 <= col < grid.cols) or grid.is_wall(row, col):
+                raise ValueError(f"({row}, {col}) is not a free cell of the {grid.rows}x{grid.cols} map")
+        if start in self.starts:
+            raise ValueError(f"two agents cannot start on the same cell {start}")
+        if goal in self.goals:
+            raise ValueError(f"two agents cannot share the goal {goal}")
+        self.starts.add(start)
+        self.goals.add(goal)
+        agent = Agent(start, goal)
+        self.agents.append(agent)
+        return agent
+
+    def _guide(self, agent, cell):  # the agent's A* path from cell, and how much of it is left from every cell
+        grid = self.grid
+        end, rest = agent.goal, []
+        if agent.guide:  # a short detour back to the old guide a window ahead is much cheaper than a new path
+            ahead = min(len(agent.guide) - 1, agent.progress + self.window)
+            end, rest = grid.position(agent.guide[ahead]), agent.guide[ahead + 1:]
+        result = astar.astar(grid, grid.position(cell), end, heuristic=self.heuristic)
+        agent.guides += 1
+        agent.expanded += result.expanded
+        agent.guide = [grid.index(*position) for position in result.path] + rest
+        agent.progress = 0
+        agent.along = {cell: number for number, cell in enumerate(agent.guide)}
+        left = [0] * len(agent.guide)
+        for number in range(len(agent.guide) - 2, -1, -1):
+            left[number] = left[number + 1] + grid.path_cost(agent.guide[number:number + 2])
+        agent.left = left
+
+    def plan(self, observer=None, stats=None):  # plans every agent until all of them arrived, returns the agents
+        # observer.step() is called after every window search, returning False stops planning
+        if stats is not None:
+            stats.begin()
+        grid = self.grid
+        clock = self.clock
+        for agent in self.agents:
+            if agent.guide is None:
+                begin = clock()
+                self._guide(agent, grid.index(*agent.start))
+                agent.seconds += clock() - begin
+        longest = max((len(agent.guide) for agent in self.agents), default=0)
+        max_steps = self.max_steps or 4 * longest + 4 * self.window
+        if stats is not None:
+            stats.phase('guides')
+        while self.time < max_steps and not self.cancelled:
+            moving = [number for number, agent in enumerate(self.agents)
+                      if agent.guide and agent.path[-1] != agent.goal]
+            if not moving:
+                break
+            plans = self._round(moving, observer)
+            if plans is None:
+                break
+            for agent, cells in zip(self.agents, plans):
+                agent.path.extend(grid.position(cell) for cell in cells[:self.interval])
+            self.time += self.interval
+            self.rounds += 1
+        for agent in self.agents:  # waiting on the goal at the end is not part of the path
+            while len(agent.path) > 1 and agent.path[-1] == agent.goal and agent.path[-2] == agent.goal:
+                agent.path.pop()
+            if agent.path[-1] == agent.goal:
+                agent.arrived = agent.steps
+        if stats is not None:
+            stats.phase('windows')
+            stats.count(agents=len(self.agents), arrived=sum(agent.arrived is not None for agent in self.agents),
+                        rounds=self.rounds, restarts=self.restarts,
+                        expanded=sum(agent.expanded for agent in self.agents))
+        return self.agents
+
+    def _round(self, moving, observer):  # the cells of every agent for the next window steps, None if cancelled
+        agents = self.agents
+        # the agents closest to their goal plan first, so one following another is not held up by it; agents
+        # sitting on their goal plan last, and step aside if they are in the way
+        waiting = set(moving)
+        cells = [self.grid.index(*agent.path[-1]) for agent in agents]
+        order = sorted(moving, key=lambda number: (agents[number].left[agents[number].progress],
+                                                   (number - self.rounds) % len(agents)))
+        order += [number for number in range(len(agents)) if number not in waiting]
+        # an agent holds its cell for one step until it plans, so the agents before it cannot take it from under
+        # it. Those agents can still box it in before the next round; it then plans first and the round starts
+        # over. If that does not settle it, every agent holds its cell for all the steps carried out: staying put
+        # is then always allowed, but nobody can move into a cell its agent has not planned to leave yet
+        for restarts in range(MAX_RESTARTS + 1):
+            hold = 1 if restarts < MAX_RESTARTS else self.interval
+            plans, boxed = self._plan_round(order, cells, hold, observer)
+            if boxed is None:
+                return plans
+            self.restarts += 1
+            order.remove(boxed)
+            order.insert(0, boxed)
+
+    def _plan_round(self, order, cells, hold, observer):  # (plans, None), or (None, an agent that was boxed in)
+        now = self.time
+        reserved = self.reserved = {}
+        for number, cell in enumerate(cells):
+            for step in range(now, now + hold + 1):
+                reserved[(step, cell)] = number
+        plans = [None] * len(cells)
+        for number in order:
+            cell = cells[number]
+            for step in range(now + 1, now + hold + 1):
+                del reserved[(step, cell)]
+            agent = self.agents[number]
+            begin = self.clock()
+            plan = plans[number] = self._window(agent, number, cell)
+            agent.seconds += self.clock() - begin
+            if observer is not None and not observer.step():
+                self.cancelled = True
+                return None, None
+            if len(plan) < self.interval:
+                return None, number
+            for step, cell in enumerate(plan, now + 1):
+                reserved[(step, cell)] = number
+        return plans, None
+
+    def _window(self, agent, number, current):  # space-time A* from current, up to window steps deep
+        grid, reserved, window = self.grid, self.reserved, self.window
+        now = self.time
+        goal = grid.index(*agent.goal)
+        estimate, position = self.estimate, grid.position
+        if not agent.guide:  # its goal cannot be reached: it stays where it is, but steps aside when in the way
+            target, rest = current, 0
+        else:
+            if current in agent.along:
+                agent.progress = agent.along[current]
+                agent.strayed = False
+            elif agent.strayed:  # it did not get back to its guide within a round, find a new one from here
+                self._guide(agent, current)
+                agent.strayed = False
+            else:  # stepped aside, first try to get back to where it left the guide
+                agent.strayed = True
+            ahead = min(len(agent.guide) - 1, agent.progress + window)
+            target, rest = agent.guide[ahead], agent.left[ahead]  # aim for the guide cell a window ahead
+        if current == target and all(reserved.get((step, current), number) == number
+                                     for step in range(now + 1, now + window + 1)):
+            return [current] * window  # nobody needs the cell, no search needed to stay
+        goal_position = position(target)
+
+        def h(cell):
+            return estimate(position(cell), goal_position) + rest
+
+        inf = float("inf")
+        g_score = {(current, 0): 0}
+        came_from = {}
+        open_heap = [(h(current), 0, 0, current)]
+        counter = 0
+        expanded = 0
+        deepest = (current, 0)  # boxed in before the end of the window, the agent goes as far as it can
+        while open_heap:
+            f, _, depth, cell = heappop(open_heap)
+            state = (cell, depth)
+            g = g_score[state]
+            if f > g + h(cell):  # stale entry
+                continue
+            expanded += 1
+            if depth > deepest[1]:
+                deepest = state
+            if depth == window:
+                break
+            step = now + depth
+            # staying costs 1 like the cheapest move, except on the goal where the agent is meant to stay
+            moves = grid.edges(cell) + [(cell, 0 if cell == goal else 1)]
+            for neighbor, step_cost in moves:
+                owner = reserved.get((step + 1, neighbor))
+                if owner is not None and owner != number:
+                    continue
+                if neighbor != cell:  # two agents may not swap cells in one step
+                    other = reserved.get((step, neighbor))
+                    if other is not None and other != number and reserved.get((step + 1, cell)) == other:
+                        continue
+                following = (neighbor, depth + 1)
+                temp_g_score = g + step_cost
+                if temp_g_score < g_score.get(following, inf):
+                    g_score[following] = temp_g_score
+                    came_from[following] = state
+                    counter += 1
+                    heappush(open_heap, (temp_g_score + h(neighbor), counter, depth + 1, neighbor))
+        agent.expanded += expanded
+        plan = []
+        state = deepest
+        while state in came_from:
+            plan.append(state[0])
+            state = came_from[state]
+        plan.reverse()
+        return plan
+
+
+def cooperative_astar(grid, queries, window=WINDOW, observer=None, heuristic=None, stats=None, **options):
+    # queries: (start, goal) pairs, one per agent; returns the agents with their paths and planning times
+    planner = CooperativePlanner(grid, window, heuristic=heuristic, **options)
+    for start, goal in queries:
+        planner.add_agent(start, goal)
+    return planner.plan(observer, stats)
+
+def collisions(agents):  # (time step, kind, first agent, second agent) of every vertex or swap conflict
+    found = []
+    length = max((len(agent.path) for agent in agents), default=0)
+
+    def at(agent, step):
+        return agent.path[min(step, len(agent.path) - 1)]
+
+    occupied_before = {}
+    for step in range(length):
+        occupied = {}
+        for number, agent in enumerate(agents):
+            cell = at(agent, step)
+            if cell in occupied:
+                found.append((step, 'vertex', occupied[cell], number))
+            occupied[cell] = number
+            if step:  # each swap is found from the agent with the higher number
+                other = occupied_before.get(cell)
+                if other is not None and other < number and at(agents[other], step) == at(agent, step - 1):
+                    found.append((step, 'swap', other, number))
+        occupied_before = {at(agent, step): number for number, agent in enumerate(agents)}
+    return found
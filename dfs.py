@@ -1,44 +1,45 @@
-import pygame
-from utils import reconstruct_path, print_path
+from utils import reconstruct_path, finish_search, stop_search
 
-def dfs(draw, grid, start, end):
+def dfs(grid, start, end, observer=None, stats=None):
+    if stats is not None:
+        stats.begin()
+    start = grid.index(*start)
+    end = grid.index(*end)
     stack = [] # initialize a stack to keep track of nodes to explore
-    visited = [] # list to keep track of visited nodes
+    visited = bytearray(grid.size) # one byte per cell marks visited nodes, so membership checks are O(1)
     stack.append(start) # push the start node onto the stack
-    visited.append(start) # mark the start node as visited
     came_from = {} # dictionary to store the path from start to current node
     distance_from_start = {start: 0}  
-    
+    expanded = 0
+    if stats is not None:
+        stats.phase('setup')
+
     while stack: 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return False
-        
         current_node = stack.pop() # pop the last node added to the stack
 
-        if current_node not in visited: # if the current node hasn't been visited yet, mark it as visited
-            visited.append(current_node)
+        if visited[current_node]: # a node can be pushed several times before it is popped, expand it only once
+            continue
+        visited[current_node] = 1
+        expanded += 1
 
         if current_node == end: # if the current node is the end node, return the path
-            path = reconstruct_path(came_from, end, start, draw)
-            end.make_end()
-            start.make_start()
-            print_path(path)
-            draw()
-            return True
+            if stats is not None:
+                stats.phase('expansion')
+            path = reconstruct_path(came_from, end, start)
+            return finish_search(grid, path, grid.path_cost(path), expanded, observer, stats)
 
-        for neighbor in current_node.neighbors: # explore the neighbors
-            if neighbor not in visited : # if the neighbor is not visited
+        for neighbor in grid.neighbors(current_node): # explore the neighbors
+            if not visited[neighbor]: # if the neighbor is not visited
                 came_from[neighbor] = current_node # record where it came from
                 stack.append(neighbor)
-                neighbor.make_open()
                 distance_from_start[neighbor] = distance_from_start[current_node] + 1
+                if observer is not None:
+                    observer.opened(neighbor)
                 
-        draw()
-
-        if current_node != start:
-            current_node.make_closed(distance_from_start[current_node])  # mark processed nodes as closed
+        if observer is not None:
+            if current_node != start:
+                observer.closed(current_node, distance_from_start[current_node])  # mark processed nodes as closed
+            if not observer.step():
+                return stop_search(expanded, stats, cancelled=True)
 
-    return False
-    
\ No newline at end of file
+    return stop_search(expanded, stats)
@@ -1,53 +1,134 @@
-import pygame
-from queue import PriorityQueue
-from utils import reconstruct_path, print_path
+import numpy as np
+from priority_queue import make_queue
+from utils import reconstruct_path, join_paths, finish_search, stop_search
 
-def dijkstra(draw, grid, start, end):
-    open_set = PriorityQueue() # priority queue to explore nodes with minimum distance
-    open_set.put((0, start)) # start with the initial node and its cost (0)
+def dijkstra(grid, start, end, observer=None, queue='lazy', stats=None):
+    if stats is not None:
+        stats.begin()
+    start = grid.index(*start)
+    end = grid.index(*end)
+    open_set = make_queue(queue) # priority queue to explore nodes with minimum distance
+    open_set.push(start, 0) # start with the initial node and its cost (0)
     came_from = {}  # dictionary to store the path from start to current node
 
-    # initialize the shortest path cost for all nodes to infinity, except the start node
-    shortest_path_cost = {node: float("inf") for row in grid for node in row}
-    shortest_path_cost[start] = 0 # the cost to reach the start node is 0
-    in_open_set = {start}  # set to track nodes currently in the open set
+    # shortest path cost found so far, filled in lazily: a missing entry means infinity
+    shortest_path_cost = {start: 0} # the cost to reach the start node is 0
+    inf = float("inf")
+    expanded = 0
+    if stats is not None:
+        stats.phase('setup')
 
-    while not open_set.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return False
+    while open_set:
+        current_node = open_set.pop()[0] # get the node with the lowest cost from the priority queue
+        expanded += 1
 
-        current_node = open_set.get()[1] # get the node with the lowest cost from the priority queue
-        in_open_set.remove(current_node) # remove the current node from the open set
-
-        # if we've reached the end node, reconstruct and display the path
+        # if we've reached the end node, reconstruct and return the path
         if current_node == end:
-            path = reconstruct_path(came_from, end, start, draw)
-            end.make_end()
-            start.make_start()
-            print_path(path)
-            draw()
-            return True
+            if stats is not None:
+                stats.phase('expansion')
+            path = reconstruct_path(came_from, end, start)
+            return finish_search(grid, path, shortest_path_cost[end], expanded, observer, stats, (open_set,))
 
         # explore each neighboring node of the current node
-        for neighbor in current_node.neighbors:
-            tentative_cost = shortest_path_cost[current_node] + 1 # moving to a neighbor costs 1
+        for neighbor, step_cost in grid.edges(current_node):
+            tentative_cost = shortest_path_cost[current_node] + step_cost # moving to a neighbor costs what entering it costs
 
             # if this path to the neighbor is shorter, update the path and cost for that neighbor
-            if tentative_cost < shortest_path_cost[neighbor]:
+            if tentative_cost < shortest_path_cost.get(neighbor, inf):
                 came_from[neighbor] = current_node
                 shortest_path_cost[neighbor] = tentative_cost
-
-                # if the neighbor is not in open_set, add it to explore later
-                if neighbor not in in_open_set:
-                    open_set.put((shortest_path_cost[neighbor], neighbor))
-                    in_open_set.add(neighbor)
-                    neighbor.make_open()  #
-        
-        draw()
+                open_set.push(neighbor, tentative_cost) # add it to explore later, or lower its priority if already queued
+                if observer is not None:
+                    observer.opened(neighbor)
         
-        if current_node != start:
-            current_node.make_closed(shortest_path_cost[current_node])
+        if observer is not None:
+            if current_node != start:
+                observer.closed(current_node, shortest_path_cost[current_node])
+            if not observer.step():
+                return stop_search(expanded, stats, (open_set,), cancelled=True)
+
+    return stop_search(expanded, stats, (open_set,))
+
+def bidirectional_dijkstra(grid, start, end, observer=None, queue='lazy', potential=None, stats=None):
+    # runs Dijkstra forward from the start and backward from the end, one expansion per side in turn.
+    # potential(cell) turns it into bidirectional A*: the forward side orders its queue by cost + potential
+    # and the backward side by cost - potential, which keeps both searches on the same non-negative
+    # reduced edge costs, so the usual stopping rule below stays exact
+    if stats is not None:
+        stats.begin()
+    start = grid.index(*start)
+    end = grid.index(*end)
+    if start == end:
+        return finish_search(grid, [start], 0, 0, observer, stats)
+    if potential is None:
+        potential = lambda cell: 0
+    open_sets = (make_queue(queue), make_queue(queue))
+    open_sets[0].push(start, potential(start))
+    open_sets[1].push(end, -potential(end))
+    cost = ({start: 0}, {end: 0}) # cheapest cost found from the start, and to the end
+    came_from = ({}, {})
+    settled = (set(), set())
+    inf = float("inf")
+    best = inf # cost of the cheapest complete path seen so far
+    meeting = None
+    expanded = 0
+    side = 0
+    if stats is not None:
+        stats.phase('setup')
+
+    while open_sets[0] and open_sets[1]:
+        # no path through unsettled nodes can beat best once the two smallest keys add up to it
+        if open_sets[0].peek()[1] + open_sets[1].peek()[1] >= best:
+            break
+        mine, other = cost[side], cost[1 - side]
+        current_node = open_sets[side].pop()[0]
+        settled[side].add(current_node)
+        expanded += 1
+        sign = 1 if side == 0 else -1
+        edges = grid.edges(current_node) if side == 0 else grid.reverse_edges(current_node)
+
+        for neighbor, step_cost in edges:
+            if neighbor in settled[side]:
+                continue
+            tentative_cost = mine[current_node] + step_cost
+            if tentative_cost < mine.get(neighbor, inf):
+                mine[neighbor] = tentative_cost
+                came_from[side][neighbor] = current_node
+                open_sets[side].push(neighbor, tentative_cost + sign * potential(neighbor))
+                if observer is not None:
+                    observer.opened(neighbor, backward=side == 1)
+            if neighbor in other and tentative_cost + other[neighbor] < best: # the frontiers touch
+                best = tentative_cost + other[neighbor]
+                meeting = (current_node, neighbor) if side == 0 else (neighbor, current_node)
+
+        if observer is not None:
+            if current_node != start and current_node != end:
+                observer.closed(current_node, mine[current_node], backward=side == 1)
+            if not observer.step():
+                return stop_search(expanded, stats, open_sets, cancelled=True)
+        side = 1 - side
+
+    if meeting is None:
+        return stop_search(expanded, stats, open_sets)
+    if stats is not None:
+        stats.phase('expansion')
+    path = join_paths(came_from[0], came_from[1], meeting[0], meeting[1], start, end)
+    return finish_search(grid, path, best, expanded, observer, stats, open_sets)
 
-    return False
\ No newline at end of file
+def cost_to_goal(grid, end, queue='lazy'):
+    # cheapest cost of reaching end (row, col) from every cell, as a (rows, cols) float64 array with inf where
+    # end cannot be reached: Dijkstra run backwards from end over every cell of the map
+    end = grid.index(*end)
+    open_set = make_queue(queue)
+    open_set.push(end, 0)
+    cost = {end: 0}
+    inf = float("inf")
+    while open_set:
+        current_node, current_cost = open_set.pop()
+        for neighbor, step_cost in grid.reverse_edges(current_node): # step_cost is what stepping from neighbor into current_node costs
+            if current_cost + step_cost < cost.get(neighbor, inf):
+                cost[neighbor] = current_cost + step_cost
+                open_set.push(neighbor, current_cost + step_cost)
+    field = np.full(grid.size, np.inf)
+    field[list(cost)] = list(cost.values())
+    return field.reshape(grid.rows, grid.cols)
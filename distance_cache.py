@@ -0,0 +1,74 @@
+from collections import OrderedDict
+import numpy as np
+import bfs
+import dijkstra
+from utils import SearchResult, finish_search
+
+# many agents heading for the same few goals: instead of one search per agent, compute once per goal the cost
+# of reaching it from every cell, then answer each start by walking downhill on that field, which only looks
+# at the cells of the path. Fields are kept per (map version, goal), least recently used first out once they
+# take more than the memory budget, and every field of an older map version is dropped on the next lookup.
+
+class DistanceFieldCache:
+    def __init__(self, grid, budget=64 * 2 ** 20):
+        self.grid = grid
+        self.budget = budget  # bytes of fields to keep, the newest field is kept even if it alone is larger
+        self.fields = OrderedDict()  # (map version, goal) -> flat cost-to-goal field, least recently used first
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.fields)
+
+    def field(self, goal):  # the cost of reaching goal (row, col) from every cell, as a (rows, cols) array
+        return self._field(goal)[0].reshape(self.grid.rows, self.grid.cols)
+
+    def _field(self, goal):  # the flat field and the number of cells computing it expanded, 0 when it was cached
+        grid = self.grid
+        key = (grid.version, goal)
+        field = self.fields.get(key)
+        if field is not None:
+            self.hits += 1
+            self.fields.move_to_end(key)
+            return field, 0
+        self.misses += 1
+        for old in [old for old in self.fields if old[0] != grid.version]:  # the map changed since these were computed
+            self.nbytes -= self.fields.pop(old).nbytes
+        if grid.unit_cost:  # every step costs 1: the vectorized BFS gives the same numbers much faster
+            steps = bfs.distance_field(grid, goal).reshape(-1).astype(np.float32)  # exact up to 2**24 steps
+            steps[steps < 0] = np.inf
+            if grid.is_wall(*goal):  # nothing can step into a barrier, the BFS spreads out of it all the same
+                steps[:] = np.inf
+                steps[grid.index(*goal)] = 0
+            field = steps
+        else:
+            field = dijkstra.cost_to_goal(grid, goal).reshape(-1)
+        self.fields[key] = field
+        self.nbytes += field.nbytes
+        while self.nbytes > self.budget and len(self.fields) > 1:
+            self.nbytes -= self.fields.popitem(last=False)[1].nbytes
+        return field, int(np.isfinite(field).sum())
+
+    def find_path(self, start, end, observer=None):  # same result as an optimal solver, from the field of end
+        grid = self.grid
+        if grid.is_wall(*start) or grid.is_wall(*end):  # same contract as search.find_path
+            return SearchResult([], None, 0)
+        field, expanded = self._field(end)
+        values = memoryview(field)  # cheap scalar reads while walking
+        current = grid.index(*start)
+        goal = grid.index(*end)
+        path = [current]
+        cost = 0
+        inf = float("inf")
+        while current != goal:
+            best, best_total, step = None, inf, 0
+            for neighbor, step_cost in grid.edges(current):  # the neighbor from which the rest of the way is cheapest
+                if step_cost + values[neighbor] < best_total:
+                    best, best_total, step = neighbor, step_cost + values[neighbor], step_cost
+            if best is None:  # the goal cannot be reached from here
+                return SearchResult([], None, expanded)
+            cost += step
+            current = best
+            path.append(current)
+        return finish_search(grid, path, cost, expanded, observer)
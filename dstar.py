@@ -0,0 +1,137 @@
+from astar import grid_heuristic
+from priority_queue import make_queue
+from utils import SearchResult, finish_search, stop_search
+
+# D* Lite (Koenig & Likhachev): an incremental planner that searches backwards from the end and keeps its
+# search state between calls. After cells change, only the nodes whose cost-to-goal is affected get
+# re-expanded, so small map edits (or the start moving along the path) cost a small repair instead of a
+# full new search. g is the cost-to-goal from the last expansion, rhs the one-step lookahead value;
+# a node is consistent when the two agree.
+
+KEY_TOLERANCE = 1e-9  # keys closer than this to the start's count as ties
+
+class DStarLite:
+    def __init__(self, grid, start, end, queue='lazy'):
+        self.grid = grid
+        self.start = grid.index(*start)
+        self.end = grid.index(*end)
+        self.estimate = grid_heuristic(grid)
+        self.g = {}  # missing entries are infinity, so setup does not depend on the map size
+        self.rhs = {self.end: 0}
+        self.open_set = make_queue(queue)
+        self.key_modifier = 0  # grows as the start moves, instead of re-keying the whole queue
+        self.last_start = self.start
+        self.open_set.push(self.end, self._key(self.end))
+
+    def _h(self, cell):  # heuristic distance from the start, the search runs towards it
+        return self.estimate(self.grid.position(self.start), self.grid.position(cell))
+
+    def _key(self, cell):
+        inf = float("inf")
+        best = min(self.g.get(cell, inf), self.rhs.get(cell, inf))
+        return (best + self._h(cell) + self.key_modifier, best)
+
+    def _recompute_rhs(self, cell):  # one-step lookahead: the cheapest way to leave the cell towards the end
+        if cell != self.end:
+            g = self.g
+            inf = float("inf")
+            self.rhs[cell] = min((step_cost + g.get(neighbor, inf) for neighbor, step_cost in self.grid.edges(cell)), default=inf)
+
+    def _update_queue(self, cell, observer=None):  # a cell is queued exactly when it is inconsistent
+        inf = float("inf")
+        if cell in self.open_set:
+            self.open_set.remove(cell)
+        if self.g.get(cell, inf) != self.rhs.get(cell, inf):
+            self.open_set.push(cell, self._key(cell))
+            if observer is not None:
+                observer.opened(cell, backward=True)
+
+    def _compute_shortest_path(self, observer=None):
+        inf = float("inf")
+        open_set, g, rhs = self.open_set, self.g, self.rhs
+        expanded = 0
+        # until the start is consistent and nothing queued could still lower its cost. Keys are sums of floats on
+        # diagonal and weighted maps, a key that ties with the start's up to rounding is expanded as well
+        while open_set:
+            start_key = self._key(self.start)
+            top_key = open_set.peek()[1]
+            if top_key >= (start_key[0] + KEY_TOLERANCE, start_key[1]) and rhs.get(self.start, inf) == g.get(self.start, inf):
+                break
+            cell, old_key = open_set.peek()
+            new_key = self._key(cell)
+            if old_key < new_key:  # the key went stale because the start moved, queue it again
+                open_set.remove(cell)
+                open_set.push(cell, new_key)
+                continue
+            expanded += 1
+            open_set.remove(cell)
+            if g.get(cell, inf) > rhs[cell]:  # overconsistent: settle the lower cost and offer it to the predecessors
+                g[cell] = cost = rhs[cell]
+                if observer is not None:
+                    observer.closed(cell, cost, backward=True)
+                for neighbor, step_cost in self.grid.reverse_edges(cell):
+                    if neighbor != self.end and step_cost + cost < rhs.get(neighbor, inf):
+                        rhs[neighbor] = step_cost + cost
+                        self._update_queue(neighbor, observer)
+            else:  # underconsistent: the cell got more expensive, predecessors that relied on it look again
+                old_cost = g[cell]
+                g[cell] = inf
+                for neighbor, step_cost in self.grid.reverse_edges(cell) + [(cell, 0)]:
+                    if rhs.get(neighbor, inf) == step_cost + old_cost or neighbor == cell:
+                        self._recompute_rhs(neighbor)
+                    self._update_queue(neighbor, observer)
+            if observer is not None and not observer.step():
+                return expanded, True
+        return expanded, False
+
+    def plan(self, observer=None, stats=None):  # repairs the search state if needed and returns the current best path
+        if stats is not None:  # the search state already exists, there is no setup phase
+            stats.begin()
+        expanded, cancelled = self._compute_shortest_path(observer)
+        if cancelled:
+            return stop_search(expanded, stats, cancelled=True)
+        inf = float("inf")
+        cost = self.rhs.get(self.start, inf)
+        if cost == inf or not self.grid.flat[self.start]:
+            return stop_search(expanded, stats)
+        if stats is not None:
+            stats.phase('expansion')
+        # walk down the cost-to-goal values from the start; every step must get strictly closer to the end, so an
+        # out of date state (update_cells was not called) gives no path instead of a walk in circles
+        path = [self.start]
+        current = self.start
+        g = self.g
+        left = g.get(current, inf)
+        while current != self.end:
+            current = min(self.grid.edges(current), key=lambda edge: edge[1] + g.get(edge[0], inf), default=(None,))[0]
+            if current is None or not g.get(current, inf) < left or len(path) > self.grid.size:
+                return SearchResult([], None, expanded, stats=stats)
+            left = g[current]
+            path.append(current)
+        return finish_search(self.grid, path, cost, expanded, observer, stats)
+
+    def update_cells(self, cells):  # call after changing the cost or barrier state of these (row, col) cells
+        grid = self.grid
+        reach = 1  # a cell change affects the edges of every cell around it (diagonals may no longer cut past it)
+        changed = set()
+        for row, col in cells:
+            for near_row in range(max(0, row - reach), min(grid.rows, row + reach + 1)):
+                for near_col in range(max(0, col - reach), min(grid.cols, col + reach + 1)):
+                    changed.add(grid.index(near_row, near_col))
+        for cell in changed:
+            self._recompute_rhs(cell)
+            self._update_queue(cell)
+
+    def move_start(self, start):  # the agent moved along its path, the search state stays valid
+        self.start = self.grid.index(*start)
+        self.key_modifier += self.estimate(self.grid.position(self.last_start), self.grid.position(self.start))
+        self.last_start = self.start
+
+
+def dstar_lite(grid, start, end, observer=None, queue='lazy', stats=None):  # one-shot use, same interface as the other solvers
+    if stats is not None:
+        stats.begin()
+    planner = DStarLite(grid, start, end, queue)
+    if stats is not None:
+        stats.phase('setup')
+    return planner.plan(observer, stats)
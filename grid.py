@@ -0,0 +1,192 @@
+import math
+import numpy as np
+
+# plain grid model used by the solvers; it knows nothing about pygame so searches can run headless.
+# the whole map is one contiguous uint8 array: 0 marks a barrier, anything else is the cost of entering the cell
+WALL = 0
+FREE = 1
+MAX_COST = 255
+SQRT2 = math.sqrt(2)  # a diagonal step costs this much more than a straight one
+# optional neighbor bitmasks: one bit per move in the order neighbors() returns them (down, up, left, right, then
+# down-left, down-right, up-left, up-right), set when the move is allowed. Diagonal bits already respect corners,
+# so the masks are the same with or without diagonal movement, which only decides which bits are read.
+STRAIGHT_MOVES = 0x0f
+ALL_MOVES = 0xff
+
+class Grid:
+    def __init__(self, rows, cols=None, cells=None, diagonal=False):
+        self.rows = rows
+        self.cols = rows if cols is None else cols
+        if cells is None:
+            cells = np.full((self.rows, self.cols), FREE, dtype=np.uint8)
+        self.cells = cells
+        # flat memoryview over the same buffer: indexing it from Python is much cheaper than indexing the array
+        self._flat = memoryview(cells.reshape(-1))
+        self._diagonal = diagonal
+        self.version = 0  # bumped by every change made through set_cost or diagonal, caches of derived data compare it
+        self.weighted = bool((cells > FREE).any())  # True once some cell costs more than 1 to enter
+        self.masks = None  # (rows, cols) uint8 neighbor bitmasks once precompute_neighbors was called
+        self._update_cost_model()
+
+    @property
+    def size(self):
+        return self.rows * self.cols
+
+    @property
+    def nbytes(self):
+        return self.cells.nbytes
+
+    @property
+    def flat(self):  # the cells as one flat memoryview, indexed by flat cell index
+        return self._flat
+
+    @property
+    def uniform(self):  # every move costs the same (1 straight, sqrt(2) diagonal), the default cost model with no terrain
+        return not self.weighted and type(self).step_cost is Grid.step_cost
+
+    @property
+    def diagonal(self):  # True for 8-connected movement, False for the classic 4 directions
+        return self._diagonal
+
+    @diagonal.setter
+    def diagonal(self, value):
+        self._diagonal = value
+        self.version += 1
+        self._update_cost_model()
+
+    def _update_cost_model(self):
+        # with unit costs the solvers get (neighbor, 1) pairs without going through step_cost at all;
+        # a subclass overriding step_cost always takes the general path
+        self.unit_cost = not self._diagonal and self.uniform
+        self._moves = ALL_MOVES if self._diagonal else STRAIGHT_MOVES
+
+    def copy(self):  # an independent grid with the same cells and movement mode
+        grid = type(self)(self.rows, self.cols, self.cells.copy(), self._diagonal)
+        if self.masks is not None:
+            grid._use_masks(self.masks.copy())
+        return grid
+
+    def precompute_neighbors(self):  # keeps a bitmask of the allowed moves per cell, set_cost updates it in place
+        self._use_masks(neighbor_masks(self.cells))
+        return self
+
+    def _use_masks(self, masks):
+        self.masks = masks
+        self._flat_masks = memoryview(masks.reshape(-1))
+        cols = self.cols
+        offsets = (cols, -cols, -1, 1, cols - 1, cols + 1, -cols - 1, -cols + 1)
+        # the neighbor offsets of every possible mask, so neighbors() is one lookup and one list comprehension
+        self._mask_offsets = [tuple(offset for bit, offset in enumerate(offsets) if mask >> bit & 1) for mask in range(256)]
+
+    def index(self, row, col):  # cells are addressed by a flat index internally
+        return row * self.cols + col
+
+    def position(self, index):
+        return divmod(index, self.cols)
+
+    def is_wall(self, row, col):
+        return self._flat[row * self.cols + col] == WALL
+
+    def cost(self, row, col):
+        return self._flat[row * self.cols + col]
+
+    def set_wall(self, row, col, wall=True):
+        self.set_cost(row, col, WALL if wall else FREE)
+
+    def set_cost(self, row, col, cost):  # cost of entering the cell, 1..255, or WALL
+        if not WALL <= cost <= MAX_COST:
+            raise ValueError(f"cell cost must be between {WALL} and {MAX_COST}, got {cost}")
+        index = row * self.cols + col
+        previous = self._flat[index]
+        self._flat[index] = cost
+        self.version += 1
+        if self.masks is not None and bool(previous) != bool(cost):  # only the moves around the cell change
+            top, left = max(0, row - 1), max(0, col - 1)
+            self.masks[top:row + 2, left:col + 2] = neighbor_masks(self.cells, top, row + 2, left, col + 2)
+        if cost > FREE and not self.weighted:
+            self.weighted = True
+            self._update_cost_model()
+        elif previous > FREE and cost <= FREE and self.weighted:
+            self.weighted = bool((self.cells > FREE).any())
+            self._update_cost_model()
+
+    def step_cost(self, neighbor, diagonal):  # cost model, override in a subclass to plug in a different one
+        cost = self._flat[neighbor]
+        return cost * SQRT2 if diagonal else cost
+
+    def neighbors(self, index):  # neighbor offsets are applied on the fly, in the old order: down, up, left, right
+        if self.masks is not None:
+            return [index + offset for offset in self._mask_offsets[self._flat_masks[index] & self._moves]]
+        cells = self._flat
+        cols = self.cols
+        row, col = divmod(index, cols)
+        down = row < self.rows - 1 and cells[index + cols]
+        up = row > 0 and cells[index - cols]
+        left = col > 0 and cells[index - 1]
+        right = col < cols - 1 and cells[index + 1]
+        result = []
+        if down:
+            result.append(index + cols)
+        if up:
+            result.append(index - cols)
+        if left:
+            result.append(index - 1)
+        if right:
+            result.append(index + 1)
+        if self._diagonal:  # a diagonal move may not cut a corner, both cells it passes between must be free
+            if down and left and cells[index + cols - 1]:
+                result.append(index + cols - 1)
+            if down and right and cells[index + cols + 1]:
+                result.append(index + cols + 1)
+            if up and left and cells[index - cols - 1]:
+                result.append(index - cols - 1)
+            if up and right and cells[index - cols + 1]:
+                result.append(index - cols + 1)
+        return result
+
+    def edges(self, index):  # (neighbor, step cost) pairs for the cost-based solvers
+        if self.unit_cost:
+            return [(neighbor, 1) for neighbor in self.neighbors(index)]
+        cols = self.cols
+        row, col = divmod(index, cols)
+        step_cost = self.step_cost
+        return [(neighbor, step_cost(neighbor, neighbor // cols != row and neighbor % cols != col))
+                for neighbor in self.neighbors(index)]
+
+    def reverse_edges(self, index):  # (neighbor, cost of stepping from the neighbor into this cell), for searches run backwards
+        if not self._flat[index]:  # nothing can step into a barrier
+            return []
+        if self.unit_cost:
+            return [(neighbor, 1) for neighbor in self.neighbors(index)]
+        cols = self.cols
+        row, col = divmod(index, cols)
+        step_cost = self.step_cost
+        return [(neighbor, step_cost(index, neighbor // cols != row and neighbor % cols != col))
+                for neighbor in self.neighbors(index)]
+
+    def path_cost(self, path):  # total cost of walking a path given as flat indices
+        cols = self.cols
+        total = 0
+        for previous, cell in zip(path, path[1:]):
+            total += self.step_cost(cell, previous // cols != cell // cols and previous % cols != cell % cols)
+        return total
+
+
+def neighbor_masks(cells, top=0, bottom=None, left=0, right=None):  # bitmasks of the moves out of a block of cells
+    rows, cols = cells.shape
+    bottom = rows if bottom is None else min(rows, bottom)
+    right = cols if right is None else min(cols, right)
+    # free cells of the block plus a one cell border, outside the map counts as a barrier
+    free = np.zeros((bottom - top + 2, right - left + 2), dtype=bool)
+    low, high = max(0, top - 1), min(rows, bottom + 1)
+    first, last = max(0, left - 1), min(cols, right + 1)
+    free[low - top + 1:high - top + 1, first - left + 1:last - left + 1] = cells[low:high, first:last] != WALL
+    down, up = free[2:, 1:-1], free[:-2, 1:-1]
+    to_left, to_right = free[1:-1, :-2], free[1:-1, 2:]
+    moves = (down, up, to_left, to_right,
+             down & to_left & free[2:, :-2], down & to_right & free[2:, 2:],
+             up & to_left & free[:-2, :-2], up & to_right & free[:-2, 2:])
+    masks = np.zeros(down.shape, dtype=np.uint8)
+    for bit, allowed in enumerate(moves):
+        masks |= allowed.astype(np.uint8) << bit
+    return masks
@@ -0,0 +1,186 @@
+import hashlib
+import numpy as np
+from astar import grid_heuristic
+from priority_queue import make_queue
+from utils import SearchResult, reconstruct_path, finish_search
+
+# Hierarchical path-finding A* (HPA*). The grid is cut into square clusters; cells on both sides of a cluster
+# border where a path can cross become entrance nodes of an abstract graph, with edges across the border and
+# cached shortest distances between the entrances of each cluster. A query connects start and end to the
+# entrances of their clusters, searches the small abstract graph and then refines every abstract edge with a
+# search that never leaves one cluster. Paths are near-optimal (usually within a few percent), not optimal.
+# The index describes the map it was built from: rebuild it after editing the map.
+
+WIDE_ENTRANCE = 6  # border openings at least this wide get a transition at each end instead of one in the middle
+
+class HierarchicalIndex:
+    def __init__(self, grid, cluster_size=16):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.checksum = map_checksum(grid)
+        self.edges = {}  # abstract node (flat cell index) -> list of (abstract node, cost)
+
+    def cluster(self, index):  # (cluster row, cluster column) of a cell
+        row, col = self.grid.position(index)
+        return row // self.cluster_size, col // self.cluster_size
+
+    def bounds(self, cluster):  # first and past-the-last row and column of a cluster
+        size = self.cluster_size
+        row, col = cluster
+        return row * size, min((row + 1) * size, self.grid.rows), col * size, min((col + 1) * size, self.grid.cols)
+
+    def _add_edge(self, a, b, cost):
+        self.edges.setdefault(a, []).append((b, cost))
+        self.edges.setdefault(b, [])
+
+    def build(self):
+        grid = self.grid
+        size = self.cluster_size
+        self.edges = {}
+        # transitions between vertically and horizontally adjacent clusters
+        for border in range(size, grid.rows, size):  # horizontal borders, between row border - 1 and row border
+            self._add_transitions([(grid.index(border - 1, col), grid.index(border, col)) for col in range(grid.cols)])
+        for border in range(size, grid.cols, size):  # vertical borders
+            self._add_transitions([(grid.index(row, border - 1), grid.index(row, border)) for row in range(grid.rows)])
+        # cached shortest distances between the entrances of every cluster
+        by_cluster = {}
+        for node in self.edges:
+            by_cluster.setdefault(self.cluster(node), []).append(node)
+        for cluster, nodes in by_cluster.items():
+            for node in nodes:
+                cost = self._local_search(node, cluster)[0]
+                for other in nodes:
+                    if other != node and other in cost:
+                        self._add_edge(node, other, cost[other])
+        return self
+
+    def _add_transitions(self, pairs):  # pairs of cells facing each other across one cluster border
+        cells = self.grid.flat
+        run = []  # consecutive open pairs along the border of one pair of clusters
+        for a, b in pairs:
+            open_pair = cells[a] and cells[b]
+            if run and (not open_pair or self.cluster(a) != self.cluster(run[-1][0])):
+                self._add_entrance(run)
+                run = []
+            if open_pair:
+                run.append((a, b))
+        if run:
+            self._add_entrance(run)
+
+    def _add_entrance(self, run):
+        picks = [run[0], run[-1]] if len(run) >= WIDE_ENTRANCE else [run[len(run) // 2]]
+        for near, far in picks:
+            self._add_edge(near, far, self.grid.step_cost(far, False))
+            self._add_edge(far, near, self.grid.step_cost(near, False))
+
+    def _local_search(self, source, cluster, target=None, reverse=False):
+        # Dijkstra that never leaves the cluster, from source to every cell or until target is settled;
+        # reverse=True measures the cost of reaching source from each cell instead
+        grid = self.grid
+        row_low, row_high, col_low, col_high = self.bounds(cluster)
+        open_set = make_queue()
+        open_set.push(source, 0)
+        cost = {source: 0}
+        came_from = {}
+        expanded = 0
+        inf = float("inf")
+        while open_set:
+            current_node, current_cost = open_set.pop()
+            expanded += 1
+            if current_node == target:
+                break
+            for neighbor, step_cost in (grid.reverse_edges(current_node) if reverse else grid.edges(current_node)):
+                row, col = grid.position(neighbor)
+                if not (row_low <= row < row_high and col_low <= col < col_high):
+                    continue
+                if current_cost + step_cost < cost.get(neighbor, inf):
+                    cost[neighbor] = current_cost + step_cost
+                    came_from[neighbor] = current_node
+                    open_set.push(neighbor, current_cost + step_cost)
+        return cost, came_from, expanded
+
+    def find_path(self, start, end, observer=None):
+        grid = self.grid
+        start = grid.index(*start)
+        end = grid.index(*end)
+        if not grid.flat[start] or not grid.flat[end]:
+            return SearchResult([], None, 0)
+        start_cluster, end_cluster = self.cluster(start), self.cluster(end)
+
+        # temporary edges from the start to the entrances of its cluster, and from the entrances around the end to it
+        from_start, _, expanded = self._local_search(start, start_cluster)
+        to_end, _, end_expanded = self._local_search(end, end_cluster, reverse=True)
+        expanded += end_expanded
+        leaving_start = [(node, cost) for node, cost in from_start.items() if node in self.edges and node != start]
+        entering_end = {node: cost for node, cost in to_end.items() if node in self.edges and node != end}
+        if start_cluster == end_cluster and end in from_start:  # the direct path inside the cluster is a candidate too
+            leaving_start.append((end, from_start[end]))
+
+        # A* over the abstract graph
+        estimate = grid_heuristic(grid)
+        goal = grid.position(end)
+        open_set = make_queue()
+        open_set.push(start, estimate(grid.position(start), goal))
+        g_score = {start: 0}
+        came_from = {}
+        inf = float("inf")
+        while open_set:
+            current_node = open_set.pop()[0]
+            expanded += 1
+            if current_node == end:
+                break
+            edges = self.edges.get(current_node, [])
+            if current_node == start:
+                edges = edges + leaving_start
+            if current_node in entering_end:
+                edges = edges + [(end, entering_end[current_node])]
+            for neighbor, step_cost in edges:
+                temp_g_score = g_score[current_node] + step_cost
+                if temp_g_score < g_score.get(neighbor, inf):
+                    g_score[neighbor] = temp_g_score
+                    came_from[neighbor] = current_node
+                    open_set.push(neighbor, temp_g_score + estimate(grid.position(neighbor), goal))
+        if end not in g_score:
+            return SearchResult([], None, expanded)
+
+        # refine every abstract edge into cells: steps across a border are direct, the rest stay in one cluster
+        abstract = reconstruct_path(came_from, end, start)
+        path = [start]
+        for a, b in zip(abstract, abstract[1:]):
+            if self.cluster(a) != self.cluster(b):
+                path.append(b)
+                continue
+            _, local_came_from, local_expanded = self._local_search(a, self.cluster(a), b)
+            expanded += local_expanded
+            path.extend(reconstruct_path(local_came_from, b, a)[1:])
+        return finish_search(grid, path, g_score[end], expanded, observer)
+
+    def save(self, file):
+        nodes = sorted(self.edges)
+        source = [a for a in nodes for _ in self.edges[a]]
+        target = [b for a in nodes for b, _ in self.edges[a]]
+        cost = [c for a in nodes for _, c in self.edges[a]]
+        np.savez_compressed(file, shape=np.array([self.grid.rows, self.grid.cols, self.cluster_size], dtype=np.int64),
+                            checksum=np.array(self.checksum), nodes=np.array(nodes, dtype=np.int64),
+                            source=np.array(source, dtype=np.int64), target=np.array(target, dtype=np.int64),
+                            cost=np.array(cost, dtype=np.float64))
+
+
+def map_checksum(grid):  # identifies the exact map (and movement mode) an index was built for
+    digest = hashlib.sha1(grid.cells.tobytes())
+    digest.update(b'8' if grid.diagonal else b'4')
+    return digest.hexdigest()
+
+def build_index(grid, cluster_size=16):
+    return HierarchicalIndex(grid, cluster_size).build()
+
+def load_index(file, grid):  # loads an index saved with HierarchicalIndex.save for the same map
+    with np.load(file) as data:
+        rows, cols, cluster_size = (int(v) for v in data['shape'])
+        if (rows, cols) != (grid.rows, grid.cols) or str(data['checksum']) != map_checksum(grid):
+            raise ValueError("the index was built for a different map")
+        index = HierarchicalIndex(grid, cluster_size)
+        index.edges = {int(node): [] for node in data['nodes']}
+        for a, b, cost in zip(data['source'].tolist(), data['target'].tolist(), data['cost'].tolist()):
+            index.edges[a].append((b, cost))
+    return index
@@ -0,0 +1,162 @@
+from astar import astar, grid_heuristic
+from grid import SQRT2
+from priority_queue import make_queue
+from utils import reconstruct_path, finish_search, stop_search
+
+# Jump Point Search: A* that only puts "jump points" on the open set. From every expanded node it scans
+# in straight lines (and diagonals on 8-connected grids) and stops only where a path could have to turn,
+# so long open corridors cost one expansion instead of one per cell. Only valid when all moves cost the same.
+
+def sign(value):
+    return (value > 0) - (value < 0)
+
+def jps(grid, start, end, observer=None, queue='lazy', stats=None):
+    if not grid.uniform:  # terrain costs break the pruning rules, fall back to plain A*
+        return astar(grid, start, end, observer, queue, stats=stats)
+    if stats is not None:
+        stats.begin()
+    goal = end
+    rows, cols, cells = grid.rows, grid.cols, grid.flat
+    estimate = grid_heuristic(grid)
+
+    def free(row, col):
+        return 0 <= row < rows and 0 <= col < cols and cells[row * cols + col]
+
+    def jump_straight(row, col, d_row, d_col):  # scans from (row, col) in a straight line, returns the next jump point
+        while True:
+            row += d_row
+            col += d_col
+            if not free(row, col):
+                return None
+            if (row, col) == goal:
+                return row, col
+            if d_col:  # moving horizontally, a cell above or below that opens up behind a wall forces a turn
+                if (free(row - 1, col) and not free(row - 1, col - d_col)) or (free(row + 1, col) and not free(row + 1, col - d_col)):
+                    return row, col
+            else:
+                if (free(row, col - 1) and not free(row - d_row, col - 1)) or (free(row, col + 1) and not free(row - d_row, col + 1)):
+                    return row, col
+                # without diagonals, paths go vertical first and then turn: check for horizontal jump points
+                if not grid.diagonal and (jump_straight(row, col, 0, 1) or jump_straight(row, col, 0, -1)):
+                    return row, col
+
+    def jump_diagonal(row, col, d_row, d_col):
+        while True:
+            if not (free(row + d_row, col) and free(row, col + d_col)):  # diagonal moves never cut corners
+                return None
+            row += d_row
+            col += d_col
+            if not free(row, col):
+                return None
+            if (row, col) == goal:
+                return row, col
+            if jump_straight(row, col, d_row, 0) or jump_straight(row, col, 0, d_col):
+                return row, col
+
+    def successors(row, col, parent):  # directions worth scanning from a node, given the direction it was reached in
+        if parent is None:  # the start node scans in every direction
+            directions = [(1, 0), (-1, 0), (0, -1), (0, 1)]
+            if grid.diagonal:
+                directions += [(1, -1), (1, 1), (-1, -1), (-1, 1)]
+            return directions
+        d_row = sign(row - parent[0])
+        d_col = sign(col - parent[1])
+        directions = []
+        if d_row and d_col:
+            free_row = free(row + d_row, col)
+            free_col = free(row, col + d_col)
+            if free_row:
+                directions.append((d_row, 0))
+            if free_col:
+                directions.append((0, d_col))
+            if free_row and free_col:
+                directions.append((d_row, d_col))
+        elif not grid.diagonal:  # keep going straight or turn by 90 degrees
+            directions.append((d_row, d_col))
+            directions.append((d_col, d_row))
+            directions.append((-d_col, -d_row))
+        elif d_col:
+            ahead = free(row, col + d_col)
+            below = free(row + 1, col)
+            above = free(row - 1, col)
+            if ahead:
+                directions.append((0, d_col))
+                if below:
+                    directions.append((1, d_col))
+                if above:
+                    directions.append((-1, d_col))
+            if below:
+                directions.append((1, 0))
+            if above:
+                directions.append((-1, 0))
+        else:
+            ahead = free(row + d_row, col)
+            right = free(row, col + 1)
+            left = free(row, col - 1)
+            if ahead:
+                directions.append((d_row, 0))
+                if right:
+                    directions.append((d_row, 1))
+                if left:
+                    directions.append((d_row, -1))
+            if right:
+                directions.append((0, 1))
+            if left:
+                directions.append((0, -1))
+        return directions
+
+    start_index = grid.index(*start)
+    end_index = grid.index(*end)
+    open_set = make_queue(queue)
+    open_set.push(start_index, estimate(start, goal))
+    came_from = {}
+    g_score = {start_index: 0}
+    inf = float("inf")
+    expanded = 0
+    if stats is not None:
+        stats.phase('setup')
+
+    while open_set:
+        current_node = open_set.pop()[0]
+        expanded += 1
+
+        if current_node == end_index:
+            if stats is not None:
+                stats.phase('expansion')
+            jump_points = reconstruct_path(came_from, end_index, start_index)
+            path = [jump_points[0]] # fill in the straight segments between consecutive jump points
+            for a, b in zip(jump_points, jump_points[1:]):
+                (row, col), (to_row, to_col) = grid.position(a), grid.position(b)
+                d_row, d_col = sign(to_row - row), sign(to_col - col)
+                while (row, col) != (to_row, to_col):
+                    row += d_row
+                    col += d_col
+                    path.append(grid.index(row, col))
+            return finish_search(grid, path, g_score[end_index], expanded, observer, stats, (open_set,))
+
+        position = grid.position(current_node)
+        parent = came_from.get(current_node)
+        for d_row, d_col in successors(*position, None if parent is None else grid.position(parent)):
+            if d_row and d_col:
+                jump_point = jump_diagonal(*position, d_row, d_col)
+            else:
+                jump_point = jump_straight(*position, d_row, d_col)
+            if jump_point is None:
+                continue
+            steps = max(abs(jump_point[0] - position[0]), abs(jump_point[1] - position[1]))
+            temp_g_score = g_score[current_node] + (steps * SQRT2 if d_row and d_col else steps)
+            neighbor = grid.index(*jump_point)
+            if temp_g_score < g_score.get(neighbor, inf):
+                came_from[neighbor] = current_node
+                g_score[neighbor] = temp_g_score
+                open_set.push(neighbor, temp_g_score + estimate(jump_point, goal))
+                if observer is not None:
+                    observer.opened(neighbor)
+
+        if observer is not None:
+            if current_node != start_index:
+                observer.closed(current_node, g_score[current_node])
+            if not observer.step():
+                return stop_search(expanded, stats, (open_set,), cancelled=True)
+
+    return stop_search(expanded, stats, (open_set,))
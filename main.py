@@ -1,111 +1,142 @@
+import argparse
+import functools
 import pygame
 import astar
+import ara
+import bounded
+import cooperative
 import dfs
 import bfs
 import dijkstra
 import ucs
+import jps
+import dstar
+import mapio
+import maps
 import threading
+import time
+import numpy as np
+from grid import Grid, WALL, FREE
+from renderer import (Renderer, BLUE, WHITE, BLACK, PURPLE, PINK, BACKGROUND, TEAL, GREEN, ORANGE,
+                      EMPTY, OPEN, CLOSED, PATH, OPEN_BACKWARD, CLOSED_BACKWARD, AGENT, GOAL, distance_color, terrain_color)
+from utils import SearchRecorder, SearchStats, print_path
 
 WIDTH = 750  # set the width of the window
+ROWS = 50  # default grid size, change it with --rows and --cols
 SIDEBAR_WIDTH = 120
 BUTTON_OFFSET = 60 
-WIN = pygame.display.set_mode((WIDTH * 2, WIDTH))
-pygame.display.set_caption("Visual Search")
-
-RED = (204, 0, 0)  # for closed nodes
-GREEN = (0, 204, 0)  # for open nodes
-BLUE = (0, 0, 255)  # for ending node
-WHITE = (255, 255, 255)  # for empty nodes
-BLACK = (0, 0, 0)  # for walls
-PURPLE = (136, 3, 185)  # for starting node
-GREY = (128, 128, 128)  # for grid lines
-PINK = (249, 19, 180)  # for path
-BACKGROUND = (192, 182, 196)
-
-pygame.font.init()
-CAPTION_FONT = pygame.font.SysFont('Arial', 24)
-
-class Node:
-    def __init__(self, row, col, width, total_rows):
-        self.row = row
-        self.col = col
-        self.x = col * width
-        self.y = row * width
-        self.color = BACKGROUND
-        self.neighbors = []
-        self.width = width
-        self.total_rows = total_rows
-        self.distance_from_start = 0
-
-    def get_position(self):
-        return self.row, self.col
-
-    def is_closed(self):
-        return self.color == RED
-
-    def is_open(self):
-        return self.color == GREEN
-
-    def is_barrier(self):
-        return self.color == BLACK
-
-    def is_start(self):
-        return self.color == PURPLE
-
-    def is_end(self):
-        return self.color == BLUE
-
-    def reset(self):
-        self.color = BACKGROUND
-
-    def make_open(self):
-        self.color = GREEN
-
-    def make_barrier(self):
-        self.color = BLACK
-
-    def make_start(self):
-        self.color = PURPLE
-
-    def make_end(self):
-        self.color = BLUE
-
-    def make_path(self):
-        self.color = PINK
-
-    def make_closed(self, distance_from_start):
-        self.distance_from_start = distance_from_start  # store the distance from the start node
-        self.set_distance_color(distance_from_start)  # set the node's color based on its distance from the start node
-
-    def set_distance_color(self, distance):
-        max_intensity = 150
-        intensity = max(0, max_intensity - distance * 4)  # calculate the intensity based on the distance
-        
-        base_color = (255, 128, 128)  # light red
-        dark_red = (128, 0, 0)
-
-        red_component = max(dark_red[0], base_color[0] - intensity)
-        green_component = max(dark_red[1], base_color[1] - intensity)
-        blue_component = max(dark_red[2], base_color[2] - intensity)
-
-        self.color = (red_component, green_component, blue_component)
-
-    def draw(self, win):
-        pygame.draw.rect(win, self.color, (self.x, self.y, self.width, self.width))
-
-    def update_neighbors(self, grid):
-        self.neighbors = []
-        if self.row < self.total_rows - 1 and not grid[self.row + 1][self.col].is_barrier():  # down
-            self.neighbors.append(grid[self.row + 1][self.col])
-        if self.row > 0 and not grid[self.row - 1][self.col].is_barrier():  # up
-            self.neighbors.append(grid[self.row - 1][self.col])
-        if self.col > 0 and not grid[self.row][self.col - 1].is_barrier():  # left
-            self.neighbors.append(grid[self.row][self.col - 1])
-        if self.col < self.total_rows - 1 and not grid[self.row][self.col + 1].is_barrier():  # right
-            self.neighbors.append(grid[self.row][self.col + 1])
-
-    def __lt__(self, other):
-        return False
+SAVE_FILE = 'saved.grid'  # where S saves the map of the left grid and L loads it from
+FPS = 60  # frames per second of the animation, independent of how fast the searches run
+SPEED = 4  # recorded search events played per frame at the start, changed with the arrow keys
+MAX_SPEED = 4096
+AGENTS = 100  # agents M places on each grid, change it with --agents
+MAX_EXPANSIONS = 200000  # IDA* and SMA* give up after this many expansions instead of searching for minutes
+STEP_EVENTS = SPEED  # a multi-agent animation moves every agent one time step per this many search events
+
+# button label, solver and caption for every algorithm offered on both sides of the window
+CHOICES = [
+    ("A*", astar.astar, "A* Path Finding Algorithm"),
+    ("BFS", bfs.bfs, "BFS Algorithm"),
+    ("DFS", dfs.dfs, "DFS Algorithm"),
+    ("Dijkstra", dijkstra.dijkstra, "Dijkstra Algorithm"),
+    ("UCS", ucs.ucs, "UCS Algorithm"),
+    ("JPS", jps.jps, "Jump Point Search"),
+    ("Bi-BFS", bfs.bidirectional_bfs, "Bidirectional BFS"),
+    ("Wave BFS", bfs.wavefront_bfs, "Wavefront BFS (whole layers at once)"),
+    ("Bi-Dijkstra", dijkstra.bidirectional_dijkstra, "Bidirectional Dijkstra"),
+    ("Bi-A*", astar.bidirectional_astar, "Bidirectional A*"),
+    ("D* Lite", dstar.dstar_lite, "D* Lite (repairs the path on edits)"),
+    ("ARA*", ara.ara_star, "ARA* (anytime, weight 3 down to 1)"),
+    ("IDA*", functools.partial(bounded.ida_star, max_expansions=MAX_EXPANSIONS), "IDA* (memory-bounded)"),
+    ("SMA*", functools.partial(bounded.sma_star, max_expansions=MAX_EXPANSIONS), "SMA* (memory-bounded)"),
+]
+
+class Board:  # one side of the window: the grid being edited plus what the last search painted on it
+    def __init__(self, rows, cols=None, grid=None):
+        self.grid = Grid(rows, cols) if grid is None else grid
+        self.grid.precompute_neighbors()  # painting updates the masks, the copy each search gets carries them along
+        self.state = np.zeros(self.grid.cells.shape, dtype=np.uint8)
+        self.distance = np.zeros(self.grid.cells.shape, dtype=np.int32)  # distance from the start of closed cells
+        self.start = None
+        self.end = None
+        self.planner = None  # D* Lite search state kept after a D* Lite run, so edits only repair the path
+        self.replan = False  # set when the map changed under a live planner
+        self.pending = []  # cells edited since, the planner searches its own copy of the map and learns about them on replan
+        self.notes = []  # lines of the instrumentation overlay, drawn in a corner of the board
+        self.dirty = set()  # flat indices of the cells to repaint on the next frame
+        self.redraw = True  # repaint every cell on the next frame
+
+    def color(self, row, col):
+        if (row, col) == self.start:
+            return PURPLE
+        if (row, col) == self.end:
+            return BLUE
+        if self.grid.is_wall(row, col):
+            return BLACK
+        state = self.state[row, col]
+        if state == OPEN:
+            return GREEN
+        if state == CLOSED:
+            return distance_color(int(self.distance[row, col]))
+        if state == PATH:
+            return PINK
+        if state == OPEN_BACKWARD:
+            return TEAL
+        if state == CLOSED_BACKWARD:  # blue shades instead of red ones, measured from the end
+            return distance_color(int(self.distance[row, col]), (128, 160, 255), (0, 0, 128))
+        if state == AGENT:
+            return ORANGE
+        if state == GOAL:
+            return BLUE
+        cost = self.grid.cost(row, col)
+        if cost > FREE:
+            return terrain_color(cost)
+        return BACKGROUND
+
+    def mark(self, row, col):
+        self.dirty.add(self.grid.index(row, col))
+
+    def clear_search(self):
+        self.state.fill(EMPTY)
+        self.notes = []
+        self.redraw = True
+
+    def edited(self, row, col):  # remembers a changed cell for a live planner
+        if self.planner is not None:
+            self.pending.append((row, col))
+            self.replan = True
+
+    def reset_cell(self, row, col):
+        self.grid.set_wall(row, col, False)
+        self.state[row, col] = EMPTY
+        self.mark(row, col)
+        if (row, col) == self.start:  # clear start node
+            self.start = None
+            self.planner = None
+        elif (row, col) == self.end:  # clear end node
+            self.end = None
+            self.planner = None
+        else:
+            self.edited(row, col)
+
+    def clear_wall(self, row, col):  # the start and end are always free cells, even when placed on a barrier
+        if self.grid.is_wall(row, col):
+            self.grid.set_wall(row, col, False)
+            self.edited(row, col)
+
+    def click(self, row, col, brush=WALL):
+        position = (row, col)
+        self.mark(row, col)
+        if not self.start and position != self.end:  # set start node
+            self.start = position
+            self.clear_wall(row, col)
+        elif not self.end and position != self.start:  # set end note
+            self.end = position
+            self.clear_wall(row, col)
+        elif position != self.end and position != self.start:  # paint a barrier or terrain with the current brush
+            if self.grid.cost(row, col) != brush:
+                self.grid.set_cost(row, col, brush)
+                self.edited(row, col)
 
 
 class Button:
@@ -125,220 +156,364 @@ class Button:
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
 
-def make_grid(rows, width):
-    grid = []
-    gap = width // rows
-    for i in range(rows):
-        grid.append([])
-        for j in range(rows):
-            node = Node(i, j, gap, rows)
-            grid[i].append(node)
-    return grid
-
-def draw_grid(win, rows, width, show_grid, offset=0):
-    gap = width // rows
-    if show_grid:
-        for i in range(rows):
-            pygame.draw.line(win, GREY, (offset, i * gap), (offset + width, i * gap))
-            for j in range(rows):
-                pygame.draw.line(win, GREY, (j * gap + offset, 0), (j * gap + offset, width))
-
-def draw(win, grid1, grid2, rows, width, show_grid, caption1, caption2, buttons):
-    win.fill(BACKGROUND)  
-
-    for row in grid1:
-        for node in row:
-            node.draw(win)
-    draw_grid(win, rows, width, show_grid)
-
-    for row in grid2:
-        for node in row:
-            node.x += width  # shift x-coordinates for the second grid
-            node.draw(win)
-        for node in row:
-            node.x -= width  # reset x-coordinates after drawing
-    draw_grid(win, rows, width, show_grid, offset=width)
-
-    separator_x = width  # line separator at the midpoint
-    pygame.draw.line(win, BLACK, (separator_x, 0), (separator_x, width), 2)  # 2-pixel thick line
-
-    caption1_text = CAPTION_FONT.render(caption1, True, BLACK)
-    caption2_text = CAPTION_FONT.render(caption2, True, BLACK)
-    win.blit(caption1_text, (width // 2 - caption1_text.get_width() // 2, 10))  # center caption for grid1
-    win.blit(caption2_text, (3 * width // 2 - caption2_text.get_width() // 2, 10))  # center caption for grid2
-
-    for button in buttons:
-        button.draw(win)
-
-    pygame.display.update()
-
-def get_clicked_pos(pos, rows, width):
-    gap = width // rows
-    x, y = pos
-
-    # determine which grid the click is in
-    if x < width:  # left grid
-        col = x // gap
-        row = y // gap
-        if row < rows and col < rows:
-            return row, col, 'left'
-    else:  # right grid
-        x -= width
-        col = x // gap
-        row = y // gap
-        if row < rows and col < rows:
-            return row, col, 'right'
-
-    return None  # if the click is out of bounds
-
-def main(win, width):
+class Animation:  # replays the events a search records onto a board, as many per frame as asked for
+    def __init__(self, board, recorder):
+        self.board = board
+        self.recorder = recorder
+        self.events = recorder.events  # still growing while the search runs in its thread
+        self.position = 0  # events before this one are on the board already
+        self.searching = True
+        self.result = None
+        self.seconds = 0  # CPU time of the search thread, drawing is not included
+        self.jump = False  # play every recorded event as soon as it arrives
+
+    @property
+    def done(self):
+        return not self.searching and self.position >= len(self.events)
+
+    def advance(self, count):
+        board = self.board
+        state = board.state.reshape(-1)  # flat views, the events carry flat cell indices
+        distance = board.distance.reshape(-1)
+        dirty = board.dirty
+        end = len(self.events) if self.jump else min(len(self.events), self.position + count)
+        for event in self.events[self.position:end]:
+            cell = event[1]
+            if event[0] == 'opened':
+                state[cell] = OPEN_BACKWARD if event[2] else OPEN
+            elif event[0] == 'closed':
+                state[cell] = CLOSED_BACKWARD if event[3] else CLOSED
+                distance[cell] = event[2]
+            else:
+                state[cell] = PATH
+            dirty.add(cell)
+        self.position = end
+
+    def finish(self):  # jump to the end
+        self.jump = True
+        self.advance(0)
+
+    def cancel(self):
+        self.recorder.cancelled = True
+
+
+class AgentAnimation:  # moves the agents of a multi-agent plan one time step at a time, once the plan is ready
+    def __init__(self, board, stats=None):
+        self.board = board
+        self.recorder = SearchRecorder()  # nothing gets recorded, it only carries the cancel flag to the planner
+        self.stats = stats
+        self.searching = True
+        self.result = None  # the planned agents
+        self.seconds = 0
+        self.time = -1  # time step shown on the board, -1 until the agents are first drawn
+        self.events = 0  # search events played since the last time step
+        self.goals = set()
+
+    @property
+    def length(self):  # time steps until the last agent stops
+        return max((len(agent.path) for agent in self.result or ()), default=0) - 1
+
+    @property
+    def done(self):
+        return not self.searching and (self.recorder.cancelled or self.time >= self.length)
+
+    def _cells(self, step):  # flat cell of every agent at a time step, agents stay where their path ends
+        grid = self.board.grid
+        return [grid.index(*agent.path[min(step, len(agent.path) - 1)]) for agent in self.result]
+
+    def _move(self):  # to the next time step
+        state = self.board.state.reshape(-1)
+        dirty = self.board.dirty
+        if self.time < 0:
+            self.goals = {self.board.grid.index(*agent.goal) for agent in self.result}
+            before = self.goals
+        else:
+            before = self._cells(self.time)
+        for cell in before:
+            state[cell] = GOAL if cell in self.goals else EMPTY
+            dirty.add(cell)
+        self.time += 1
+        for cell in self._cells(self.time):
+            state[cell] = AGENT
+            dirty.add(cell)
+
+    def advance(self, count):
+        if self.searching or not self.result:
+            return
+        if self.time < 0:
+            self._move()
+        self.events += count
+        while self.events >= STEP_EVENTS and self.time < self.length:
+            self.events -= STEP_EVENTS
+            self._move()
+
+    def finish(self):
+        if self.result:
+            while self.time < self.length:
+                self._move()
+
+    def cancel(self):
+        self.recorder.cancelled = True
+
+    def report(self):
+        agents = self.result
+        if not agents or self.recorder.cancelled:
+            return
+        arrived = [agent.arrived for agent in agents if agent.arrived is not None]
+        seconds = [agent.seconds for agent in agents]
+        print(f"{len(arrived)} of {len(agents)} agents arrived, the last one after {max(arrived, default=0)} steps")
+        print(f"planned in {self.seconds * 1000:.1f} ms: {sum(seconds) / len(agents) * 1000:.2f} ms per agent, "
+              f"{max(seconds) * 1000:.2f} ms for the slowest")
+        if self.stats is not None:
+            self.board.notes = self.stats.lines()
+
+
+def start_search(board, search, animation=None):  # runs search(observer) in a background thread, returns the animation it feeds
+    if animation is None:
+        animation = Animation(board, SearchRecorder())
+
+    def work():
+        begin = time.thread_time()
+        animation.result = search(animation.recorder)
+        animation.seconds = time.thread_time() - begin
+        animation.searching = False
+
+    threading.Thread(target=work, daemon=True).start()
+    return animation
+
+def report(animation):  # printed once the animation finished, so the two searches do not print over each other
+    if isinstance(animation, AgentAnimation):
+        animation.report()
+        return
+    result = animation.result
+    if result is not None and not result.cancelled:
+        if not result.found and result.expanded >= MAX_EXPANSIONS:  # only the capped solvers get this far
+            print(f"expansion budget exhausted after {result.expanded} nodes, no path found")
+        else:
+            print_path(result.path)
+        print(f"{result.expanded} nodes expanded in {animation.seconds * 1000:.1f} ms")
+        if result.stats is not None:
+            animation.board.notes = result.stats.lines()
+
+def make_stats(instrument):  # thread_time, the other search runs at the same time
+    return SearchStats(time.thread_time) if instrument else None
+
+def run_search(algorithm, board, instrument=False):  # starts a search and returns its animation
+    board.clear_search()
+    board.planner = None
+    grid = board.grid.copy()  # the search gets its own copy of the map, the board stays editable while it runs
+    start, end = board.start, board.end
+    stats = make_stats(instrument)
+    if algorithm is dstar.dstar_lite:  # keep the planner around so later edits only repair its path
+        planner = board.planner = dstar.DStarLite(grid, start, end)
+        board.pending = []
+        return start_search(board, lambda observer: planner.plan(observer, stats))
+    return start_search(board, lambda observer: algorithm(grid, start, end, observer, stats=stats))
+
+def run_agents(board, count, seed, instrument=False):  # plans count agents placed at random on the board's map
+    board.clear_search()
+    board.planner = None
+    grid = board.grid.copy()
+    planner = cooperative.CooperativePlanner(grid, clock=time.thread_time)
+    for start, goal in maps.agent_queries(grid, count, seed):
+        planner.add_agent(start, goal)
+    stats = make_stats(instrument)
+    return start_search(board, lambda observer: planner.plan(observer, stats), AgentAnimation(board, stats))
+
+def replan(board, instrument=False):  # repairs the D* Lite path of a board after its map was edited, once its last search is over
+    board.replan = False
+    board.clear_search()
+    planner = board.planner
+    for row, col in board.pending:
+        planner.grid.set_cost(row, col, board.grid.cost(row, col))
+    planner.update_cells(board.pending)
+    board.pending = []
+    stats = make_stats(instrument)
+    return start_search(board, lambda observer: planner.plan(observer, stats))
+
+def make_grid(rows, cols=None):
+    return Board(rows, cols)
+
+def load_boards(file):  # both grids get their own copy of the map in file, None if it cannot be loaded
+    try:
+        grid = mapio.load_any(file)
+    except (OSError, ValueError) as error:
+        print(f"Could not load {file}: {error}")
+        return None
+    return Board(grid.rows, grid.cols, grid), Board(grid.rows, grid.cols, grid.copy())
+
+def main(win, width, rows=ROWS, cols=None, map_file=None, agents=AGENTS):
     pygame.init()
-
-    ROWS = 50
-    grid1 = make_grid(ROWS, width)
-    grid2 = make_grid(ROWS, width)
-    start1 = end1 = None
-    start2 = end2 = None
+    pygame.display.set_caption("Visual Search")
+    renderer = Renderer(win, width)  # the view zooms out to fit the whole map, the wheel zooms in and a middle drag pans
+
+    grid1 = make_grid(rows, cols)
+    grid2 = make_grid(rows, cols)
+    loaded = map_file and load_boards(map_file)
+    if loaded:
+        grid1, grid2 = loaded
     running = True
     show_grid = True
+    brush = WALL  # what left clicks paint: WALL, or the terrain cost picked with the number keys
+    diagonal = grid1.grid.diagonal  # 8-connected movement, toggled with D
     caption1 = "Choose Algorithm for Left Grid"
     caption2 = "Choose Algorithm for Right Grid"
     algorithm1 = algorithm2 = None
+    animations = []  # searches still being played back
+    speed = SPEED
+    paused = False
+    instrument = False  # collect search statistics and show them over each board, toggled with I
+    agent_seed = 0  # every press of M places new agents
+    clock = pygame.time.Clock()
 
     # create buttons for algorithms
     button_width = SIDEBAR_WIDTH - 20
     button_height = 40
-    buttons = [
-        Button("A*", 20, BUTTON_OFFSET, button_width, button_height, lambda: set_algorithm('astar', 1)),
-        Button("BFS", 20, BUTTON_OFFSET + 50, button_width, button_height, lambda: set_algorithm('bfs', 1)),
-        Button("DFS", 20, BUTTON_OFFSET + 100, button_width, button_height, lambda: set_algorithm('dfs', 1)),
-        Button("Dijkstra", 20, BUTTON_OFFSET + 150, button_width, button_height, lambda: set_algorithm('dijkstra', 1)),
-        Button("UCS", 20, BUTTON_OFFSET + 200, button_width, button_height, lambda: set_algorithm('ucs', 1)),
-        Button("A*", WIDTH + 20, BUTTON_OFFSET, button_width, button_height, lambda: set_algorithm('astar', 2)),
-        Button("BFS", WIDTH + 20, BUTTON_OFFSET + 50, button_width, button_height, lambda: set_algorithm('bfs', 2)),
-        Button("DFS", WIDTH + 20, BUTTON_OFFSET + 100, button_width, button_height, lambda: set_algorithm('dfs', 2)),
-        Button("Dijkstra", WIDTH + 20, BUTTON_OFFSET + 150, button_width, button_height, lambda: set_algorithm('dijkstra', 2)),
-        Button("UCS", WIDTH + 20, BUTTON_OFFSET + 200, button_width, button_height, lambda: set_algorithm('ucs', 2)),
-    ]
-
-    def set_algorithm(algorithm, grid_num):
-        nonlocal algorithm1, algorithm2, caption1, caption2
+    buttons = []
+    for grid_num, x in ((1, 20), (2, WIDTH + 20)):
+        for i, (label, algorithm, caption) in enumerate(CHOICES):
+            action = lambda algorithm=algorithm, caption=caption, grid_num=grid_num: set_algorithm(algorithm, caption, grid_num)
+            buttons.append(Button(label, x, BUTTON_OFFSET + 50 * i, button_width, button_height, action))
+
+    def redraw():
+        renderer.draw([grid1, grid2], show_grid, [caption1, caption2], buttons)
+
+    def set_algorithm(algorithm, caption, grid_num):
+        nonlocal algorithm1, algorithm2, caption1, caption2, animations
         if grid_num == 1:
-            if algorithm == 'astar':
-                algorithm1 = astar.astar
-                caption1 = "A* Path Finding Algorithm"
-            elif algorithm == 'bfs':
-                algorithm1 = bfs.bfs
-                caption1 = "BFS Algorithm"
-            elif algorithm == 'dfs':
-                algorithm1 = dfs.dfs
-                caption1 = "DFS Algorithm"
-            elif algorithm == 'dijkstra':
-                algorithm1 = dijkstra.dijkstra
-                caption1 = "Dijkstra Algorithm"
-            elif algorithm == 'ucs':
-                algorithm1 = ucs.ucs
-                caption1 = "UCS Algorithm"
+            algorithm1 = algorithm
+            caption1 = caption
         elif grid_num == 2:
-            if algorithm == 'astar':
-                algorithm2 = astar.astar
-                caption2 = "A* Path Finding Algorithm"
-            elif algorithm == 'bfs':
-                algorithm2 = bfs.bfs
-                caption2 = "BFS Algorithm"
-            elif algorithm == 'dfs':
-                algorithm2 = dfs.dfs
-                caption2 = "DFS Algorithm"
-            elif algorithm == 'dijkstra':
-                algorithm2 = dijkstra.dijkstra
-                caption2 = "Dijkstra Algorithm"
-            elif algorithm == 'ucs':
-                algorithm2 = ucs.ucs
-                caption2 = "UCS Algorithm"
+            algorithm2 = algorithm
+            caption2 = caption
         
         # check if both algorithms are selected along with start and end nodes
-        if start1 and end1 and start2 and end2 and algorithm1 and algorithm2:
-            for row in grid1:
-                for node in row:
-                    node.update_neighbors(grid1)
-            for row in grid2:
-                for node in row:
-                    node.update_neighbors(grid2)
-            algorithm1(lambda: draw(win, grid1, grid2, ROWS, width, show_grid, caption1, caption2, buttons), grid1, start1, end1)
-            algorithm2(lambda: draw(win, grid1, grid2, ROWS, width, show_grid, caption1, caption2, buttons), grid2, start2, end2)
+        if grid1.start and grid1.end and grid2.start and grid2.end and algorithm1 and algorithm2:
+            for animation in animations:
+                animation.cancel()
+            # both searches run at once in their own threads, this loop keeps drawing and handling events
+            animations = [run_search(algorithm1, grid1, instrument), run_search(algorithm2, grid2, instrument)]
 
     while running:
-        draw(win, grid1, grid2, ROWS, width, show_grid, caption1, caption2, buttons)
+        if not paused:
+            for animation in animations:
+                animation.advance(speed)
+        for animation in animations:
+            if animation.done:
+                report(animation)
+        animations = [animation for animation in animations if not animation.done]
+        redraw()
+        clock.tick(FPS)
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
+            if event.type == pygame.MOUSEWHEEL:  # zoom around the mouse pointer
+                renderer.zoom(2 ** event.y, pygame.mouse.get_pos())
+            elif event.type == pygame.MOUSEMOTION and event.buttons[1]:  # drag with the middle button to pan
+                renderer.pan(*event.rel)
+
+            # buttons react once per press; holding the button only keeps painting, a click on a button that
+            # moves the mouse a little must not restart both searches over and over
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                for button in buttons:
+                    if button.is_clicked(event.pos):
+                        button.action()
+
             if pygame.mouse.get_pressed()[0]:  # left button of the mouse
                 pos = pygame.mouse.get_pos()
-                clicked_pos = get_clicked_pos(pos, ROWS, width)
+                clicked_pos = renderer.cell_at(pos, [grid1, grid2])
 
                 if clicked_pos:
-                    row, col, grid_side = clicked_pos
-
-                    if grid_side == 'left':  # left half (first grid)
-                        node = grid1[row][col]
-                        if not start1 and node != end1:  # set start node
-                            start1 = node
-                            start1.make_start()
-                        elif not end1 and node != start1:  # set end note
-                            end1 = node
-                            end1.make_end()
-                        elif node != end1 and node != start1:  # make barrier
-                            node.make_barrier()
+                    pane, row, col = clicked_pos
+
+                    if pane == 0:  # left half (first grid)
+                        grid1.click(row, col, brush)
                     else:  # right half (second grid)
-                        node = grid2[row][col]
-                        if not start2 and node != end2:  # set start node
-                            start2 = node
-                            start2.make_start()
-                        elif not end2 and node != start2:  # set end note
-                            end2 = node
-                            end2.make_end()
-                        elif node != end2 and node != start2:  # make barrier
-                            node.make_barrier()
-
-                # Check if any button was clicked
-                for button in buttons:
-                    if button.is_clicked(pos):
-                        button.action()
+                        grid2.click(row, col, brush)
 
             elif pygame.mouse.get_pressed()[2]:  # right button of the mouse
                 pos = pygame.mouse.get_pos()
-                clicked_pos = get_clicked_pos(pos, ROWS, width)
+                clicked_pos = renderer.cell_at(pos, [grid1, grid2])
 
                 if clicked_pos:
-                    row, col, grid_side = clicked_pos
-
-                    if grid_side == 'left':
-                        node = grid1[row][col]
-                        node.reset()  # reset node to default state
-                        if node == start1:  # clear start node
-                            start1 = None
-                        elif node == end1:  # clear end node
-                            end1 = None
+                    pane, row, col = clicked_pos
+
+                    if pane == 0:
+                        grid1.reset_cell(row, col)  # reset node to default state
                     else:
-                        node = grid2[row][col]
-                        node.reset()  # reset node to default state
-                        if node == start2:  # clear start node
-                            start2 = None
-                        elif node == end2:  # clear end node
-                            end2 = None
+                        grid2.reset_cell(row, col)  # reset node to default state
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_r:  # reset the grid
-                    start1 = end1 = None
-                    start2 = end2 = None
-                    grid1 = make_grid(ROWS, width)
-                    grid2 = make_grid(ROWS, width)
+                    grid1 = make_grid(rows, cols)
+                    grid2 = make_grid(rows, cols)
+                    grid1.grid.diagonal = grid2.grid.diagonal = diagonal
+                    for animation in animations:
+                        animation.cancel()
+                    animations = []
+                elif event.key == pygame.K_s:  # save the map of the left grid
+                    mapio.save_map(grid1.grid, SAVE_FILE)
+                    print(f"Saved the left map to {SAVE_FILE}")
+                elif event.key == pygame.K_l:  # load the saved map into both grids
+                    loaded = load_boards(SAVE_FILE)
+                    if loaded:
+                        for animation in animations:
+                            animation.cancel()
+                        animations = []
+                        grid1, grid2 = loaded
+                        diagonal = grid1.grid.diagonal
                 elif event.key == pygame.K_g:  # toggle the grid
                     show_grid = not show_grid
-
+                elif event.key == pygame.K_i:  # toggle search statistics, they show up after the next search
+                    instrument = not instrument
+                    grid1.notes = grid2.notes = []
+                elif event.key == pygame.K_m:  # plan many agents on each grid at once and animate all of them
+                    for animation in animations:
+                        animation.cancel()
+                    animations = [run_agents(board, agents, agent_seed, instrument) for board in (grid1, grid2)]
+                    agent_seed += 1
+                elif event.key == pygame.K_d:  # toggle diagonal movement on both grids
+                    diagonal = not diagonal
+                    grid1.grid.diagonal = grid2.grid.diagonal = diagonal
+                    grid1.planner = grid2.planner = None  # the edges changed everywhere, a repair would not be cheaper
+                elif event.key == pygame.K_b or event.key == pygame.K_0:  # paint barriers
+                    brush = WALL
+                elif pygame.K_1 <= event.key <= pygame.K_9:  # paint terrain, 1 is plain ground and 9 the most expensive
+                    brush = event.key - pygame.K_0
+                elif event.key == pygame.K_UP:  # play the searches faster
+                    speed = min(MAX_SPEED, speed * 2)
+                elif event.key == pygame.K_DOWN:  # slower
+                    speed = max(1, speed // 2)
+                elif event.key == pygame.K_SPACE:  # pause or resume
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:  # one event at a time while paused
+                    for animation in animations:
+                        animation.advance(1)
+                elif event.key == pygame.K_END:  # jump to the end of the searches
+                    for animation in animations:
+                        animation.finish()
+                elif event.key == pygame.K_HOME:  # zoom out to the whole map
+                    renderer.fit(grid1.grid.rows, grid1.grid.cols)
+
+        for board in (grid1, grid2):  # repair D* Lite paths after edits instead of searching again
+            if board.replan and board.planner is not None:
+                if any(animation.board is board and animation.searching for animation in animations):
+                    continue  # the planner is still busy, repair once it is done
+                animations = [animation for animation in animations if animation.board is not board]
+                animations.append(replan(board, instrument))
+
+    for animation in animations:
+        animation.cancel()
     pygame.quit()
 
 if __name__ == "__main__":
-    main(WIN, WIDTH)
+    parser = argparse.ArgumentParser(description="Visual comparison of path finding algorithms")
+    parser.add_argument("map", nargs="?", help="map to open: native, or MovingAI .map")
+    parser.add_argument("--rows", type=int, default=ROWS, help="rows of a new grid")
+    parser.add_argument("--cols", type=int, help="columns of a new grid, as many as rows by default")
+    parser.add_argument("--agents", type=int, default=AGENTS, help="agents M places on each grid")
+    args = parser.parse_args()
+    WIN = pygame.display.set_mode((WIDTH * 2, WIDTH))
+    main(WIN, WIDTH, args.rows, args.cols, args.map, args.agents)
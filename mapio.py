@@ -0,0 +1,81 @@
+import struct
+import numpy as np
+from grid import Grid, WALL, FREE
+
+# reading and writing maps. The native format is a 16 byte header followed by the cells exactly as Grid keeps
+# them (one uint8 per cell, row by row), so loading is a memory map of the file: no parsing and no Python
+# object per cell. MovingAI benchmark maps (.map) and scenarios (.scen) can be imported as well.
+
+MAGIC = b'GRID'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHBxII')  # magic, format version, diagonal flag, padding, rows, cols
+
+def save_map(grid, file):
+    with open(file, 'wb') as out:
+        out.write(HEADER.pack(MAGIC, FORMAT_VERSION, grid.diagonal, grid.rows, grid.cols))
+        out.write(np.ascontiguousarray(grid.cells).tobytes())
+
+def load_map(file, mmap=True):
+    # with mmap the cells stay in the file and are paged in on use; the mapping is copy-on-write, so
+    # editing the grid never changes the file (save it again for that)
+    with open(file, 'rb') as source:
+        header = source.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{file} is too short to be a map file")
+        magic, version, diagonal, rows, cols = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{file} is not a map file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{file} has map format version {version}, expected {FORMAT_VERSION}")
+        if not mmap:
+            cells = np.fromfile(source, dtype=np.uint8, count=rows * cols)
+            if cells.size != rows * cols:
+                raise ValueError(f"{file} is truncated")
+            return Grid(rows, cols, cells.reshape(rows, cols), bool(diagonal))
+    cells = np.memmap(file, dtype=np.uint8, mode='c', offset=HEADER.size, shape=(rows, cols))
+    return Grid(rows, cols, cells, bool(diagonal))
+
+# MovingAI terrain: '.' and 'G' are ground, 'S' is swamp, passable like ground; '@', 'O' (out of bounds),
+# 'T' (trees) and 'W' (water, only passable from water) become barriers
+MOVINGAI_CELLS = np.full(256, WALL, dtype=np.uint8)
+for passable in b'.GS':
+    MOVINGAI_CELLS[passable] = FREE
+
+def load_movingai_map(file):
+    with open(file, 'rb') as source:
+        header = {}
+        while True:
+            line = source.readline()
+            if not line:
+                raise ValueError(f"{file} has no 'map' line")
+            words = line.split()
+            if words == [b'map']:
+                break
+            if len(words) == 2:
+                header[words[0].decode()] = words[1].decode()
+        if 'height' not in header or 'width' not in header:
+            raise ValueError(f"{file} has no height/width")
+        rows, cols = int(header['height']), int(header['width'])
+        text = np.frombuffer(source.read(), dtype=np.uint8)
+    text = text[(text != ord('\n')) & (text != ord('\r'))]  # the rows are fixed width, drop the line breaks
+    if text.size < rows * cols:
+        raise ValueError(f"{file} has fewer cells than its {rows}x{cols} header")
+    cells = MOVINGAI_CELLS[text[:rows * cols]].reshape(rows, cols)
+    return Grid(rows, cols, cells, diagonal=header.get('type') == 'octile')
+
+def load_scenarios(file):
+    # (start, end, optimal length) for every line of a MovingAI .scen file, positions as (row, col)
+    scenarios = []
+    with open(file) as source:
+        for line in source:
+            fields = line.split()
+            if len(fields) < 9 or fields[0] == 'version':
+                continue
+            start_x, start_y, goal_x, goal_y = (int(value) for value in fields[4:8])
+            scenarios.append(((start_y, start_x), (goal_y, goal_x), float(fields[8])))
+    return scenarios
+
+def load_any(file):  # picks the reader from the file extension, anything else is taken as the native format
+    if file.endswith('.map'):
+        return load_movingai_map(file)
+    return load_map(file)
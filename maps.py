@@ -0,0 +1,103 @@
+import numpy as np
+from grid import Grid, WALL, FREE
+
+# reproducible map generators for benchmarks and demos; the same seed always gives the same map
+
+def open_map(rows, cols=None, seed=0):
+    return Grid(rows, cols)
+
+def random_map(rows, cols=None, seed=0, density=0.2):  # each cell is a barrier with probability density
+    cols = rows if cols is None else cols
+    rng = np.random.default_rng(seed)
+    cells = np.where(rng.random((rows, cols)) < density, WALL, FREE).astype(np.uint8)
+    return Grid(rows, cols, cells)
+
+def maze_map(rows, cols=None, seed=0):  # perfect maze with one-cell corridors, carved by a randomized depth-first search
+    cols = rows if cols is None else cols
+    rng = np.random.default_rng(seed)
+    cells = np.zeros((rows, cols), dtype=np.uint8)
+    cells[1, 1] = FREE
+    stack = [(1, 1)]
+    while stack:
+        row, col = stack[-1]
+        options = [(row + d_row, col + d_col) for d_row, d_col in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 < row + d_row < rows - 1 and 0 < col + d_col < cols - 1 and not cells[row + d_row, col + d_col]]
+        if not options:
+            stack.pop()
+            continue
+        next_row, next_col = options[rng.integers(len(options))]
+        cells[(row + next_row) // 2, (col + next_col) // 2] = FREE  # knock down the wall in between
+        cells[next_row, next_col] = FREE
+        stack.append((next_row, next_col))
+    return Grid(rows, cols, cells)
+
+def rooms_map(rows, cols=None, seed=0, room=12, loops=0.25):  # square rooms behind one-cell walls, joined by two-cell doorways
+    # a spanning tree of doorways keeps every room reachable, loops is the chance of an extra doorway between other neighbors
+    cols = rows if cols is None else cols
+    rng = np.random.default_rng(seed)
+    cells = np.full((rows, cols), FREE, dtype=np.uint8)
+    cells[::room, :] = WALL
+    cells[:, ::room] = WALL
+    room_rows = (rows - 2) // room + 1  # rooms that have at least one free row
+    room_cols = (cols - 2) // room + 1
+
+    def doorway(first, second):  # opens the wall between two neighboring rooms
+        (row, col), (other_row, other_col) = first, second
+        if row != other_row:  # one above the other, the doorway goes through a horizontal wall
+            low, high = col * room + 1, min((col + 1) * room, cols)
+            at = int(rng.integers(low, high))
+            cells[max(row, other_row) * room, at:min(at + 2, high)] = FREE
+        else:
+            low, high = row * room + 1, min((row + 1) * room, rows)
+            at = int(rng.integers(low, high))
+            cells[at:min(at + 2, high), max(col, other_col) * room] = FREE
+
+    visited = np.zeros((room_rows, room_cols), dtype=bool)
+    visited[0, 0] = True
+    stack = [(0, 0)]
+    while stack:  # randomized depth-first search over the rooms, like maze_map does over cells
+        row, col = stack[-1]
+        options = [(row + d_row, col + d_col) for d_row, d_col in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                   if 0 <= row + d_row < room_rows and 0 <= col + d_col < room_cols and not visited[row + d_row, col + d_col]]
+        if not options:
+            stack.pop()
+            continue
+        following = options[rng.integers(len(options))]
+        doorway((row, col), following)
+        visited[following] = True
+        stack.append(following)
+    for row in range(room_rows):
+        for col in range(room_cols):
+            if row + 1 < room_rows and rng.random() < loops:
+                doorway((row, col), (row + 1, col))
+            if col + 1 < room_cols and rng.random() < loops:
+                doorway((row, col), (row, col + 1))
+    return Grid(rows, cols, cells)
+
+MAP_FAMILIES = {
+    'open': open_map,
+    'random': random_map,
+    'maze': maze_map,
+    'rooms': rooms_map,
+}
+
+def free_cells(grid):  # (row, col) of every cell that is not a barrier
+    return [tuple(int(v) for v in cell) for cell in np.argwhere(grid.cells != WALL)]
+
+def corner_query(grid):  # the free cells closest to the top-left and bottom-right corners
+    free = np.flatnonzero(grid.cells != WALL)
+    return grid.position(int(free[0])), grid.position(int(free[-1]))
+
+def random_queries(grid, count, seed=0):  # start/end pairs drawn uniformly from the free cells
+    rng = np.random.default_rng(seed)
+    free = np.flatnonzero(grid.cells != WALL)
+    picks = rng.choice(free, size=(count, 2))
+    return [(grid.position(int(a)), grid.position(int(b))) for a, b in picks]
+
+def agent_queries(grid, count, seed=0):  # start/end pairs for many agents at once: no two start or end on the same cell
+    rng = np.random.default_rng(seed)
+    free = np.flatnonzero(grid.cells != WALL)
+    count = min(count, len(free))
+    starts = rng.choice(free, size=count, replace=False)
+    ends = rng.choice(free, size=count, replace=False)
+    return [(grid.position(int(a)), grid.position(int(b))) for a, b in zip(starts, ends)]
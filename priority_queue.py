@@ -0,0 +1,174 @@
+from heapq import heappush, heappop
+
+# lock-free priority queues for the cost-based solvers (queue.PriorityQueue takes a lock on every put/get).
+# both classes share the same interface: push() inserts an item or lowers its priority, pop() returns the
+# (item, priority) pair with the lowest priority, ties are broken in insertion order
+
+class LazyHeap:  # binary heap from heapq with lazy deletion: a lower priority pushes a new entry, stale ones are skipped on pop
+    def __init__(self):
+        self.heap = []
+        self.best = {}  # current priority of every queued item
+        self.count = 0  # insertion counter used as a tie-breaker
+        self.stale = 0  # number of outdated entries thrown away by pop()
+        self.decreases = 0  # pushes that lowered the priority of a queued item
+
+    def __len__(self):
+        return len(self.best)
+
+    def __contains__(self, item):
+        return item in self.best
+
+    def __iter__(self):  # the queued items, in no particular order
+        return iter(self.best)
+
+    def priority(self, item):
+        return self.best[item]
+
+    @property
+    def inserts(self):  # pushes of items that were not queued
+        return self.count - self.decreases
+
+    def push(self, item, priority):  # returns False if the item is already queued with a priority at least as low
+        best = self.best.get(item)
+        if best is not None:
+            if best <= priority:
+                return False
+            self.decreases += 1
+        self.best[item] = priority
+        self.count += 1
+        heappush(self.heap, (priority, self.count, item))
+        return True
+
+    def remove(self, item):
+        del self.best[item]  # its heap entries become stale and are dropped when they reach the top
+
+    def _drop_stale(self):
+        heap = self.heap
+        best = self.best
+        while heap and best.get(heap[0][2]) != heap[0][0]:
+            heappop(heap)
+            self.stale += 1
+
+    def peek(self):
+        self._drop_stale()
+        priority, _, item = self.heap[0]
+        return item, priority
+
+    def pop(self):
+        self._drop_stale()
+        priority, _, item = heappop(self.heap)
+        del self.best[item]
+        return item, priority
+
+
+class IndexedHeap:  # d-ary heap that tracks the position of every item, so decrease-key happens in place
+    def __init__(self, arity=4):
+        self.arity = arity
+        self.keys = []  # (priority, insertion counter) of the entry at each heap slot
+        self.items = []
+        self.position = {}  # heap slot of every queued item
+        self.count = 0
+        self.stale = 0  # always 0, kept so both queues report the same counters
+        self.decreases = 0
+
+    @property
+    def inserts(self):
+        return self.count
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.position
+
+    def __iter__(self):
+        return iter(self.position)
+
+    def priority(self, item):
+        return self.keys[self.position[item]][0]
+
+    def push(self, item, priority):  # returns False if the item is already queued with a priority at least as low
+        index = self.position.get(item)
+        if index is None:
+            self.count += 1
+            self.keys.append((priority, self.count))
+            self.items.append(item)
+            self.position[item] = len(self.items) - 1
+            self._sift_up(len(self.items) - 1)
+            return True
+        if self.keys[index][0] <= priority:
+            return False
+        self.decreases += 1
+        self.keys[index] = (priority, self.keys[index][1])  # decrease-key keeps the original tie-breaker
+        self._sift_up(index)
+        return True
+
+    def peek(self):
+        return self.items[0], self.keys[0][0]
+
+    def pop(self):
+        item, priority = self.items[0], self.keys[0][0]
+        self._delete(0)
+        return item, priority
+
+    def remove(self, item):
+        self._delete(self.position[item])
+
+    def _delete(self, index):
+        del self.position[self.items[index]]
+        last_key = self.keys.pop()
+        last_item = self.items.pop()
+        if index == len(self.items):  # the removed entry was the last slot
+            return
+        self.keys[index] = last_key
+        self.items[index] = last_item
+        self.position[last_item] = index
+        if index > 0 and last_key < self.keys[(index - 1) // self.arity]:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+
+    def _sift_up(self, index):
+        keys, items, position, arity = self.keys, self.items, self.position, self.arity
+        key, item = keys[index], items[index]
+        while index > 0:
+            parent = (index - 1) // arity
+            if not key < keys[parent]:
+                break
+            keys[index] = keys[parent]
+            items[index] = items[parent]
+            position[items[index]] = index
+            index = parent
+        keys[index] = key
+        items[index] = item
+        position[item] = index
+
+    def _sift_down(self, index):
+        keys, items, position, arity = self.keys, self.items, self.position, self.arity
+        size = len(items)
+        key, item = keys[index], items[index]
+        while True:
+            first = index * arity + 1
+            if first >= size:
+                break
+            child = min(range(first, min(first + arity, size)), key=keys.__getitem__)  # smallest child
+            if not keys[child] < key:
+                break
+            keys[index] = keys[child]
+            items[index] = items[child]
+            position[items[index]] = index
+            index = child
+        keys[index] = key
+        items[index] = item
+        position[item] = index
+
+
+QUEUES = {
+    'lazy': LazyHeap,
+    'indexed': IndexedHeap,
+}
+
+def make_queue(kind='lazy'):
+    if kind not in QUEUES:
+        raise ValueError(f"unknown queue {kind!r}, expected one of {', '.join(QUEUES)}")
+    return QUEUES[kind]()
@@ -0,0 +1,228 @@
+import math
+import pygame
+import numpy as np
+from grid import WALL
+
+# drawing for the visualizer. The window itself is the cache: after one full paint only the cells a search
+# or a click changed get repainted, and only their rectangles are pushed to the screen, so the cost of a
+# frame follows the size of the change instead of the size of the grid. Both panes share one viewport that can
+# zoom and pan, and only the cells inside it are ever colored or drawn.
+
+RED = (204, 0, 0)  # for closed nodes
+GREEN = (0, 204, 0)  # for open nodes
+BLUE = (0, 0, 255)  # for ending node
+WHITE = (255, 255, 255)  # for empty nodes
+BLACK = (0, 0, 0)  # for walls
+PURPLE = (136, 3, 185)  # for starting node
+GREY = (128, 128, 128)  # for grid lines
+PINK = (249, 19, 180)  # for path
+BACKGROUND = (192, 182, 196)
+TERRAIN = (110, 80, 50)  # for the most expensive terrain brush
+TEAL = (0, 170, 204)  # for open nodes of the frontier grown from the end
+ORANGE = (255, 140, 0)  # for agents of a multi-agent plan
+
+# what a search left on a cell, kept per cell in a uint8 array next to the grid
+EMPTY = 0
+OPEN = 1
+CLOSED = 2
+PATH = 3
+OPEN_BACKWARD = 4  # the frontier a bidirectional search grows from the end
+CLOSED_BACKWARD = 5
+AGENT = 6  # where an agent of a multi-agent plan is at the current time step
+GOAL = 7  # the goal of one of those agents
+
+FULL_REDRAW = 4  # repaint a whole board at once when more than 1/4 of its visible cells changed
+MIN_LINE_GAP = 4  # no grid lines once cells are smaller than this many pixels
+MAX_CELL_SIZE = 64  # pixels per cell when zoomed in all the way
+
+def distance_color(distance, base_color=(255, 128, 128), dark_color=(128, 0, 0)):  # closed cells get darker the further they are from the start, light red to dark red by default
+    max_intensity = 150
+    intensity = max(0, max_intensity - distance * 4)  # calculate the intensity based on the distance
+
+    red_component = max(dark_color[0], base_color[0] - intensity)
+    green_component = max(dark_color[1], base_color[1] - intensity)
+    blue_component = max(dark_color[2], base_color[2] - intensity)
+
+    return (red_component, green_component, blue_component)
+
+def terrain_color(cost):  # cheap terrain stays close to the background, expensive terrain turns brown
+    blend = min(1, (cost - 1) / 8)
+    return tuple(round(b + (t - b) * blend) for b, t in zip(BACKGROUND, TERRAIN))
+
+# the same colors as lookup tables, for painting a whole board with a few array operations
+FADED = 38  # distance_color stops changing from here on
+TERRAIN_COLORS = np.array([BLACK] + [terrain_color(cost) for cost in range(1, 256)], dtype=np.uint8)
+CLOSED_COLORS = np.array([distance_color(distance) for distance in range(FADED + 1)], dtype=np.uint8)
+CLOSED_BACKWARD_COLORS = np.array([distance_color(distance, (128, 160, 255), (0, 0, 128)) for distance in range(FADED + 1)], dtype=np.uint8)
+
+def cell_colors(board, rows=slice(None), cols=slice(None)):  # colors of a block of cells as a (rows, cols, 3) array, same rules as Board.color
+    # slices with a step sample every few cells, start and end are then drawn over the sample they fall into
+    cells = board.grid.cells[rows, cols]
+    state = board.state[rows, cols]
+    distance = np.clip(board.distance[rows, cols], 0, FADED)
+    colors = TERRAIN_COLORS[cells]
+    colors[state == OPEN] = GREEN
+    closed = state == CLOSED
+    colors[closed] = CLOSED_COLORS[distance[closed]]
+    colors[state == PATH] = PINK
+    colors[state == OPEN_BACKWARD] = TEAL
+    closed = state == CLOSED_BACKWARD
+    colors[closed] = CLOSED_BACKWARD_COLORS[distance[closed]]
+    colors[state == GOAL] = BLUE
+    colors[state == AGENT] = ORANGE
+    colors[cells == WALL] = BLACK
+    first_row, first_col = rows.start or 0, cols.start or 0
+    for position, color in ((board.start, PURPLE), (board.end, BLUE)):
+        if position:
+            row, col = (position[0] - first_row) // (rows.step or 1), (position[1] - first_col) // (cols.step or 1)
+            if 0 <= row < colors.shape[0] and 0 <= col < colors.shape[1]:
+                colors[row, col] = color
+    return colors
+
+
+class Renderer:  # paints boards side by side, one pane of width x height pixels each
+    def __init__(self, win, width):
+        self.win = win
+        self.width = width
+        self.height = win.get_height()
+        self.font = pygame.font.SysFont('Arial', 24)
+        self.small_font = pygame.font.SysFont('Arial', 14)
+        self.layout = None  # what the overlay was rendered for
+        self.overlay = None  # grid lines, separators, captions and buttons, transparent everywhere else
+        # the viewport: pixels per cell (below 1 when zoomed out on a big map) and the first visible row and column
+        self.shape = None  # (rows, cols) of the map the viewport was fitted to
+        self.fit_size = self.size = 1
+        self.top = self.left = 0.0  # fractional while panning, drawing starts at the whole cell
+
+    def fit(self, rows, cols):  # zooms out until the whole map is visible
+        self.shape = (rows, cols)
+        self.fit_size = self.size = min(self.width, self.height) / max(rows, cols)
+        self.top = self.left = 0.0
+
+    def zoom(self, factor, pos):  # keeps the cell under pos (a pixel of either pane) in place
+        x, y = pos[0] % self.width, pos[1]
+        row, col = self.top + y / self.size, self.left + x / self.size
+        self.size = min(max(self.fit_size, MAX_CELL_SIZE), max(self.fit_size, self.size * factor))
+        self.top, self.left = row - y / self.size, col - x / self.size
+        self._clamp()
+
+    def pan(self, d_x, d_y):  # moves the map by a mouse drag of (d_x, d_y) pixels
+        self.left -= d_x / self.size
+        self.top -= d_y / self.size
+        self._clamp()
+
+    def _clamp(self):
+        rows, cols = self.shape
+        self.top = min(max(0.0, self.top), max(0.0, rows - self.height / self.size))
+        self.left = min(max(0.0, self.left), max(0.0, cols - self.width / self.size))
+
+    def visible(self, board):  # row and column slices of the cells inside the viewport
+        top, left = int(self.top), int(self.left)
+        bottom = min(board.grid.rows, top + math.ceil(self.height / self.size) + 1)
+        right = min(board.grid.cols, left + math.ceil(self.width / self.size) + 1)
+        return slice(top, bottom), slice(left, right)
+
+    def _x(self, col):  # left pixel of a column inside its pane
+        return math.floor((col - int(self.left)) * self.size)
+
+    def _y(self, row):
+        return math.floor((row - int(self.top)) * self.size)
+
+    def cell_at(self, pos, boards):  # (pane, row, col) under a pixel, None outside every map
+        pane = pos[0] // self.width
+        if pane >= len(boards):
+            return None
+        row = int(self.top) + math.floor(pos[1] / self.size)
+        col = int(self.left) + math.floor((pos[0] - pane * self.width) / self.size)
+        grid = boards[pane].grid
+        if 0 <= row < grid.rows and 0 <= col < grid.cols:
+            return pane, row, col
+        return None
+
+    def draw(self, boards, show_grid, captions, buttons):
+        shape = boards[0].grid.cells.shape
+        if shape != self.shape:
+            self.fit(*shape)
+        view = (self.size, int(self.top), int(self.left))
+        layout = (show_grid, tuple(captions), tuple((id(board), tuple(board.notes)) for board in boards), view)
+        if layout != self.layout:
+            self.overlay = self._render_overlay(boards, show_grid, captions, buttons)
+            self.layout = layout
+            for board in boards:
+                board.redraw = True
+        rects = []
+        for pane, board in enumerate(boards):
+            offset = pane * self.width
+            rows, cols = self.visible(board)
+            if board.redraw or len(board.dirty) > (rows.stop - rows.start) * (cols.stop - cols.start) // FULL_REDRAW:
+                rects.append(self._draw_board(board, offset))
+            elif board.dirty:
+                rects.extend(self._draw_cells(board, offset))
+            board.dirty.clear()
+            board.redraw = False
+        if rects:
+            pygame.display.update(rects)
+
+    def _render_overlay(self, boards, show_grid, captions, buttons):
+        width = self.width
+        height = self.height
+        overlay = pygame.Surface(self.win.get_size(), pygame.SRCALPHA)
+        for pane, board in enumerate(boards):
+            offset = pane * width
+            if show_grid and self.size >= MIN_LINE_GAP:  # one line per visible row and column
+                rows, cols = self.visible(board)
+                right = offset + min(width, self._x(cols.stop))
+                bottom = min(height, self._y(rows.stop))
+                for row in range(rows.start, rows.stop):
+                    pygame.draw.line(overlay, GREY, (offset, self._y(row)), (right, self._y(row)))
+                for col in range(cols.start, cols.stop):
+                    pygame.draw.line(overlay, GREY, (offset + self._x(col), 0), (offset + self._x(col), bottom))
+            if pane:
+                pygame.draw.line(overlay, BLACK, (offset, 0), (offset, height), 2)  # 2-pixel thick line between the grids
+            if board.notes:  # search statistics in the bottom right corner, on a translucent box
+                texts = [self.small_font.render(line, True, BLACK) for line in board.notes]
+                box_width = max(text.get_width() for text in texts) + 12
+                box_height = sum(text.get_height() for text in texts) + 8
+                box = pygame.Rect(offset + width - box_width - 6, height - box_height - 6, box_width, box_height)
+                overlay.fill((255, 255, 255, 200), box)
+                y = box.y + 4
+                for text in texts:
+                    overlay.blit(text, (box.x + 6, y))
+                    y += text.get_height()
+        for pane, caption in enumerate(captions):
+            text = self.font.render(caption, True, BLACK)
+            overlay.blit(text, (pane * width + width // 2 - text.get_width() // 2, 10))  # centered above its grid
+        for button in buttons:
+            button.draw(overlay)
+        return overlay
+
+    def _draw_board(self, board, offset):  # repaints the visible part of a board
+        pane = pygame.Rect(offset, 0, self.width, self.height)
+        rows, cols = self.visible(board)
+        size = (max(1, self._x(cols.stop)), max(1, self._y(rows.stop)))
+        step = max(1, int(1 / self.size))  # zoomed out below a pixel per cell, only color about one cell per pixel
+        sample_rows, sample_cols = slice(rows.start, rows.stop, step), slice(cols.start, cols.stop, step)
+        self.win.set_clip(pane)  # the last row and column may stick out of the pane
+        self.win.fill(BACKGROUND, pane)
+        cells = pygame.surfarray.make_surface(cell_colors(board, sample_rows, sample_cols).transpose(1, 0, 2))  # surfarray wants (x, y) order
+        self.win.blit(pygame.transform.scale(cells, size), (offset, 0))
+        self.win.blit(self.overlay, pane, pane)
+        self.win.set_clip(None)
+        return pane
+
+    def _draw_cells(self, board, offset):  # repaints the visible dirty cells of a board, returns their rectangles
+        win, overlay = self.win, self.overlay
+        pane = pygame.Rect(offset, 0, self.width, self.height)
+        rows, cols = self.visible(board)
+        grid_cols = board.grid.cols
+        rects = []
+        for cell in board.dirty:
+            row, col = divmod(cell, grid_cols)
+            if not (rows.start <= row < rows.stop and cols.start <= col < cols.stop):
+                continue
+            x, y = self._x(col), self._y(row)
+            rect = pygame.Rect(offset + x, y, max(1, self._x(col + 1) - x), max(1, self._y(row + 1) - y)).clip(pane)
+            win.fill(board.color(row, col), rect)
+            win.blit(overlay, rect, rect)  # put back the grid lines, captions and buttons over the cell
+            rects.append(rect)
+        return rects
@@ -0,0 +1,40 @@
+# headless entry point: runs any of the solvers on a grid.Grid without importing pygame
+import astar
+import ara
+import bounded
+import bfs
+import dfs
+import dijkstra
+import dstar
+import jps
+import ucs
+from utils import stop_search
+
+ALGORITHMS = {
+    'astar': astar.astar,
+    'bfs': bfs.bfs,
+    'dfs': dfs.dfs,
+    'dijkstra': dijkstra.dijkstra,
+    'jps': jps.jps,
+    'ucs': ucs.ucs,
+    'bidirectional_bfs': bfs.bidirectional_bfs,
+    'wavefront_bfs': bfs.wavefront_bfs,
+    'bidirectional_dijkstra': dijkstra.bidirectional_dijkstra,
+    'bidirectional_astar': astar.bidirectional_astar,
+    'dstar_lite': dstar.dstar_lite,
+    'ara_star': ara.ara_star,
+    'ida_star': bounded.ida_star,
+    'sma_star': bounded.sma_star,
+}
+
+def find_path(grid, start, end, algorithm='astar', observer=None, **options):
+    # options are passed through to the solver, e.g. queue='indexed' for the cost-based ones
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm {algorithm!r}, expected one of {', '.join(ALGORITHMS)}")
+    # a start or end on a barrier has no path, whichever solver runs (like hpa and D* Lite, which never search)
+    if grid.is_wall(*start) or grid.is_wall(*end):
+        stats = options.get('stats')
+        if stats is not None:
+            stats.begin()
+        return stop_search(0, stats)
+    return ALGORITHMS[algorithm](grid, start, end, observer, **options)
@@ -0,0 +1,231 @@
+# long-running path finding service: `python service.py <map files> [--port 8765 | --unix PATH]`.
+# Maps are loaded once and copied into shared memory, a pool of worker processes keeps its own read-only Grid
+# over each of them, and an asyncio loop answers HTTP requests:
+#   GET /path?map=NAME&algorithm=astar&start=ROW,COL&end=ROW,COL   (or POST /path with the same fields as JSON)
+#   GET /maps    the loaded maps
+#   GET /stats   request counts and latency percentiles per algorithm
+# Identical queries that arrive while one is being searched share its result instead of searching again.
+# Only the solvers, numpy and the standard library are imported, never pygame.
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+import numpy as np
+import batch
+import mapio
+import search
+
+LATENCY_WINDOW = 10000  # latencies kept per algorithm for the percentiles
+PERCENTILES = (50, 90, 99)
+MAX_BODY = 1 << 16  # bytes, a query is a few dozen
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+_worker_grids = {}  # map name -> Grid over the shared copy, attached once in each worker process
+
+def _attach(specs):
+    for name, spec in specs.items():
+        _worker_grids[name] = batch.attach_grid(spec)
+
+def _ready(_):
+    return os.getpid()
+
+def _solve(map_name, algorithm, start, end):  # runs in a worker, returns what gets sent back as JSON
+    begin = time.perf_counter()
+    result = search.find_path(_worker_grids[map_name], start, end, algorithm)
+    return {'found': result.found, 'path': [list(cell) for cell in result.path], 'cost': result.cost,
+            'expanded': result.expanded, 'search_ms': (time.perf_counter() - begin) * 1000}
+
+
+class RequestError(Exception):  # turned into an HTTP error response
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyStats:  # the most recent latencies of every algorithm, summarized as percentiles
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+
+    def add(self, name, seconds):
+        self.samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def summary(self):
+        result = {}
+        for name, samples in self.samples.items():
+            values = np.percentile(np.array(samples) * 1000, PERCENTILES)
+            result[name] = {'count': self.counts[name], **{f"p{p}_ms": round(float(v), 3) for p, v in zip(PERCENTILES, values)},
+                            'max_ms': round(max(samples) * 1000, 3)}
+        return result
+
+
+class PathService:
+    def __init__(self, maps, workers=None):  # maps: name -> Grid, shared with the workers as they are now
+        self.maps = maps
+        self.shared = {name: batch.share_grid(grid) for name, grid in maps.items()}
+        specs = {name: shared.spec for name, shared in self.shared.items()}
+        self.workers = workers or os.cpu_count()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_attach, initargs=(specs,))
+        # start the workers and attach the maps now: the first queries do not pay for it, and workers forked
+        # after the server socket is open would keep it open
+        set(self.pool.map(_ready, range(self.workers)))
+        self.in_flight = {}  # query -> future of the search answering it
+        self.latency = LatencyStats()
+        self.requests = 0
+        self.coalesced = 0  # requests answered by a search another request started
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        for shared in self.shared.values():
+            shared.close()
+
+    async def find_path(self, map_name, algorithm, start, end):
+        begin = time.perf_counter()
+        self._check(map_name, algorithm, start, end)
+        self.requests += 1
+        key = (map_name, algorithm, start, end)
+        future = self.in_flight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self.pool, _solve, map_name, algorithm, start, end)
+            self.in_flight[key] = future
+            future.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        result = await asyncio.shield(future)  # a client hanging up must not cancel the search for the others
+        self.latency.add(algorithm, time.perf_counter() - begin)
+        return result
+
+    def _check(self, map_name, algorithm, start, end):
+        if map_name not in self.maps:
+            raise RequestError(404, f"unknown map {map_name!r}")
+        if algorithm not in search.ALGORITHMS:
+            raise RequestError(400, f"unknown algorithm {algorithm!r}, expected one of {', '.join(search.ALGORITHMS)}")
+        grid = self.maps[map_name]
+        for row, col in (start, end):
+            if not (0 <= row < grid.rows and 0 <= col < grid.cols):
+                raise RequestError(400, f"({row}, {col}) is outside the {grid.rows}x{grid.cols} map {map_name!r}")
+
+    def stats(self):
+        return {'requests': self.requests, 'coalesced': self.coalesced, 'in_flight': len(self.in_flight),
+                'latency': self.latency.summary()}
+
+    def describe_maps(self):
+        return {name: {'rows': grid.rows, 'cols': grid.cols, 'diagonal': grid.diagonal} for name, grid in self.maps.items()}
+
+    async def handle(self, reader, writer):  # one HTTP/1.1 connection, kept open for as many requests as the client sends
+        try:
+            while True:
+                headers = {}
+                consumed = False  # the whole request was read, the next one on the connection can be parsed
+                try:
+                    request_line = await reader.readline()
+                    if not request_line:
+                        break
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                    method, target, _ = request_line.decode('latin-1').split()
+                    length = int(headers.get('content-length', 0))
+                    if length < 0:
+                        raise RequestError(400, f"invalid content length {length}")
+                    if length > MAX_BODY:
+                        raise RequestError(413, "request body too large")
+                    body = await reader.readexactly(length) if length else b''
+                    consumed = True
+                    status, payload = 200, await self._route(method, target, body)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except RequestError as error:
+                    status, payload = error.status, {'error': str(error)}
+                except (ValueError, TypeError, asyncio.LimitOverrunError) as error:
+                    # malformed numbers, JSON or fields, or a request or header line over the stream limit
+                    status, payload = 400, {'error': str(error)}
+                except Exception as error:  # e.g. a worker process died, the service keeps running
+                    status, payload = 500, {'error': repr(error)}
+                data = json.dumps(payload).encode()
+                # a request refused before its body was read leaves the stream unparseable, close the connection
+                keep_alive = consumed and headers.get('connection', '').lower() != 'close'
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                             + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == '/path':
+            if method not in ('GET', 'POST'):
+                raise RequestError(405, "use GET or POST")
+            fields = dict(parse_qsl(url.query))
+            if body:
+                fields.update(json.loads(body))
+            for name in ('map', 'start', 'end'):
+                if name not in fields:
+                    raise RequestError(400, f"missing {name!r}")
+            return await self.find_path(fields['map'], fields.get('algorithm', 'astar'),
+                                        parse_cell(fields['start']), parse_cell(fields['end']))
+        if method != 'GET':
+            raise RequestError(405, "use GET")
+        if url.path == '/stats':
+            return self.stats()
+        if url.path == '/maps':
+            return self.describe_maps()
+        raise RequestError(404, f"no such endpoint {url.path!r}")
+
+
+def parse_cell(value):  # "row,col" from a query string, or [row, col] from a JSON body
+    if isinstance(value, str):
+        value = value.split(',')
+    row, col = (int(part) for part in value)
+    return row, col
+
+def load_maps(files):  # map name (the file name without its extension) -> Grid
+    return {os.path.splitext(os.path.basename(file))[0]: mapio.load_any(file) for file in files}
+
+async def serve(service, host='127.0.0.1', port=8765, unix=None):
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, unix)
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+    stop = asyncio.Event()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):  # stop cleanly so the workers and shared memory go too
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal_number, stop.set)
+        except (NotImplementedError, AttributeError):  # no signal handlers in the event loops on Windows
+            pass
+    print(f"serving {', '.join(service.maps)} on {unix or f'http://{host}:{port}'} "
+          f"with {service.workers} workers", flush=True)
+    async with server:
+        await stop.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Path finding service over the maps given")
+    parser.add_argument('maps', nargs='+', help="map files, native or MovingAI .map; each is served under its file name")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="listen on this Unix socket instead of TCP")
+    parser.add_argument('--workers', type=int, help="search processes, one per CPU by default")
+    args = parser.parse_args()
+    service = PathService(load_maps(args.maps), args.workers)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:  # Windows
+        pass
+    finally:
+        service.close()
@@ -0,0 +1,51 @@
+# regression tests, run with `python -m pytest test_search.py`
+import random
+from grid import Grid, WALL
+import dijkstra
+import dstar
+import search
+from utils import SearchStats
+
+def test_dstar_lite_repairs_match_dijkstra():
+    # random edits and start moves on small maps, every repaired plan must be as good as a new search
+    for seed in range(300):
+        rng = random.Random(seed)
+        size = rng.randint(4, 9)
+        grid = Grid(size)
+        grid.diagonal = rng.random() < 0.5
+        cells = [(row, col) for row in range(size) for col in range(size)]
+        start, end = rng.sample(cells, 2)
+        planner = dstar.DStarLite(grid, start, end)
+        for _ in range(15):
+            edits = rng.sample([cell for cell in cells if cell not in (start, end)], rng.randint(1, 8))
+            for row, col in edits:
+                grid.set_cost(row, col, rng.choice([WALL, 1, 1, 3, 9]))
+            planner.update_cells(edits)
+            if rng.random() < 0.5:
+                start = rng.choice([cell for cell in cells if not grid.is_wall(*cell) and cell != end])
+                planner.move_start(start)
+            result = planner.plan()
+            expected = dijkstra.dijkstra(grid, start, end)
+            assert result.found == expected.found, (seed, start, end)
+            if expected.found:
+                assert abs(result.cost - expected.cost) < 1e-9, (seed, start, end)
+                assert abs(grid.path_cost([grid.index(*cell) for cell in result.path]) - expected.cost) < 1e-9
+
+def test_dstar_lite_open_diagonal_map():
+    grid = Grid(6)
+    grid.diagonal = True
+    planner = dstar.DStarLite(grid, (2, 0), (5, 3))
+    result = planner.plan()
+    assert result.found and abs(result.cost - dijkstra.dijkstra(grid, (2, 0), (5, 3)).cost) < 1e-9
+
+def test_barrier_start_or_end_has_no_path():
+    # every solver behind search.find_path agrees: nothing to search from or to a barrier
+    grid = Grid(5)
+    grid.set_wall(0, 0)
+    grid.set_wall(4, 4)
+    for algorithm in search.ALGORITHMS:
+        for start, end in (((0, 0), (2, 2)), ((2, 2), (4, 4))):
+            stats = SearchStats()
+            result = search.find_path(grid, start, end, algorithm, stats=stats)
+            assert not result.found and result.cost is None and result.expanded == 0, algorithm
+        assert search.find_path(grid, (1, 1), (3, 3), algorithm).found, algorithm
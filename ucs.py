@@ -1,50 +1,52 @@
-import pygame
-from queue import PriorityQueue
-from utils import reconstruct_path, print_path
-
-def ucs(draw, grid, start, end):
-    nodes = PriorityQueue()  # priority queue to hold nodes based on cost
-    nodes.put((0, start))  # start with the starting node at cost 0
+from priority_queue import make_queue
+from utils import reconstruct_path, finish_search, stop_search
+
+def ucs(grid, start, end, observer=None, queue='lazy', stats=None):
+    if stats is not None:
+        stats.begin()
+    start = grid.index(*start)
+    end = grid.index(*end)
+    nodes = make_queue(queue)  # priority queue to hold nodes based on cost
+    nodes.push(start, 0)  # start with the starting node at cost 0
     visited = set()  # set to track visited nodes
     came_from = {}  # track the path back from each node
 
-    # initialize all nodes with an infinite cost, except the start node
-    cost_so_far = {node: float("inf") for row in grid for node in row}
-    cost_so_far[start] = 0
-
-    while not nodes.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return False
+    # cost of the cheapest path found to each node, a missing entry means infinity
+    cost_so_far = {start: 0}
+    inf = float("inf")
+    expanded = 0
+    if stats is not None:
+        stats.phase('setup')
 
+    while nodes:
         # get the current node with the lowest cost
-        current_cost, current_node = nodes.get()
+        current_node, current_cost = nodes.pop()
+        expanded += 1
 
         if current_node == end: # if the end node is reached, reconstruct the path
-            path = reconstruct_path(came_from, end, start, draw)
-            end.make_end()
-            start.make_start()
-            print_path(path)
-            draw()
-            return True
+            if stats is not None:
+                stats.phase('expansion')
+            path = reconstruct_path(came_from, end, start)
+            return finish_search(grid, path, current_cost, expanded, observer, stats, (nodes,))
          
-        if current_node in visited: # if the current node has already been visited, skip it
-            continue
         visited.add(current_node)  # mark current node as visited
 
-        for neighbor in current_node.neighbors: # explore the neighbors of the current node
-            new_cost = cost_so_far[current_node] + 1  # cost to move to a neighbor is 1
+        for neighbor, step_cost in grid.edges(current_node): # explore the neighbors of the current node
+            if neighbor in visited: # a visited node already has its cheapest cost
+                continue
+            new_cost = current_cost + step_cost  # cost to move to a neighbor is the cost of entering it
             # if the new path to the neighbor is cheaper, update the path and cost for that neighbor
-            if new_cost < cost_so_far[neighbor]:
+            if new_cost < cost_so_far.get(neighbor, inf):
                 cost_so_far[neighbor] = new_cost
                 came_from[neighbor] = current_node
-                nodes.put((new_cost, neighbor))
-                neighbor.make_open()
-
-        draw()
+                nodes.push(neighbor, new_cost)
+                if observer is not None:
+                    observer.opened(neighbor)
 
-        if current_node != start:
-            current_node.make_closed(current_cost)
+        if observer is not None:
+            if current_node != start:
+                observer.closed(current_node, current_cost)
+            if not observer.step():
+                return stop_search(expanded, stats, (nodes,), cancelled=True)
 
-    return False  # No path found
\ No newline at end of file
+    return stop_search(expanded, stats, (nodes,))  # No path found
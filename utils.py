@@ -1,16 +1,124 @@
-import pygame
+import time
 
-def reconstruct_path(came_from, current, start, draw): # reconstructs the path from the start node to the current node
-    path = [] # initialize an empty list to store the path coordinates
+class SearchResult:  # what every solver returns: the path as (row, col) tuples plus some counters
+    def __init__(self, path, cost, expanded, cancelled=False, stats=None):
+        self.path = path
+        self.cost = cost  # total cost of the path, None if no path was found
+        self.expanded = expanded  # number of nodes taken off the frontier and expanded
+        self.cancelled = cancelled  # True if the observer stopped the search early
+        self.stats = stats  # the SearchStats passed to the solver, if any
+
+    @property
+    def found(self):
+        return bool(self.path)
+
+    def __repr__(self):
+        return f"SearchResult(found={self.found}, cost={self.cost}, expanded={self.expanded})"
+
+
+class SearchStats:  # opt-in instrumentation: pass stats=SearchStats() to a solver, read result.stats afterwards
+    # solvers only touch it between phases and when they return, a search without one pays a few None checks.
+    # counters and timings add up, so one instance can collect several searches
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock  # time.thread_time measures only the searching thread
+        self.counters = {}
+        self.timings = {}  # seconds spent in each phase: setup, expansion, reconstruction
+        self.mark = None
+
+    def begin(self):
+        self.mark = self.clock()
+
+    def phase(self, name):  # the time since the previous mark was spent in phase name
+        now = self.clock()
+        self.timings[name] = self.timings.get(name, 0) + now - self.mark
+        self.mark = now
+
+    def count(self, **counters):
+        for name, value in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def count_queues(self, queues):  # items pushed, priorities lowered, stale heap entries skipped, items left queued
+        for queue in queues:
+            self.count(pushes=queue.inserts, decreases=queue.decreases, stale=queue.stale, left=len(queue))
+
+    def lines(self):
+        return ([f"{name}: {value}" for name, value in self.counters.items()] +
+                [f"{name}: {seconds * 1000:.2f} ms" for name, seconds in self.timings.items()])
+
+    def __repr__(self):
+        return f"SearchStats({', '.join(self.lines())})"
+
+
+class SearchObserver:  # optional hooks a solver calls while it runs; the base class does nothing
+    # bidirectional solvers pass backward=True for the frontier grown from the end
+    def opened(self, cell, backward=False):  # cell (flat index) was added to the frontier
+        pass
+
+    def closed(self, cell, cost, backward=False):  # cell was expanded, cost is its distance from the start (or end)
+        pass
+
+    def step(self):  # called after every expansion, returning False cancels the search
+        return True
+
+    def found(self, path):  # path (list of flat indices, start to end) was found
+        pass
+
+
+class SearchRecorder(SearchObserver):  # keeps what a search did as a list of events, to be replayed later at any speed
+    # events are ('opened', cell, backward), ('closed', cell, cost, backward) and ('path', cell), in the order they happened
+    def __init__(self):
+        self.events = []  # only ever appended to, so another thread can read the events recorded so far
+        self.cancelled = False  # set from any thread to stop the search at its next step
+
+    def opened(self, cell, backward=False):
+        self.events.append(('opened', cell, backward))
+
+    def closed(self, cell, cost, backward=False):
+        self.events.append(('closed', cell, cost, backward))
+
+    def step(self):
+        return not self.cancelled
+
+    def found(self, path):
+        for cell in reversed(path[:-1]):  # painted from the end back to the start
+            self.events.append(('path', cell))
+
+
+def reconstruct_path(came_from, current, start): # reconstructs the path from the start node to the current node
+    path = [] # initialize an empty list to store the path cells
     while current in came_from:  # loop until we reach the start node
-        path.append(current.get_position()) # add the position of the current node to the path
-        current = came_from[current] # move to the node from which the current node was reached
-        current.make_path() # mark the current node as part of the path
-        draw() # redraw the grid to show the updated path
-    path.append(start.get_position()) # append the start position to the path
+        path.append(current) # add the current cell to the path
+        current = came_from[current] # move to the cell from which the current cell was reached
+    path.append(start) # append the start cell to the path
     path.reverse() # reverse the path to get it in the correct order (from start to end)
     return path
 
+def join_paths(came_from_start, came_from_end, meet_forward, meet_backward, start, end): # stitches the two halves of a bidirectional search
+    # meet_forward was reached from the start, meet_backward from the end, and there is an edge from the first to the second
+    forward = reconstruct_path(came_from_start, meet_forward, start)
+    backward = reconstruct_path(came_from_end, meet_backward, end)
+    backward.reverse() # the backward half runs from the end, flip it so it continues the forward half
+    if forward[-1] == backward[0]: # both halves end on the same cell
+        backward = backward[1:]
+    return forward + backward
+
+def finish_search(grid, path, cost, expanded, observer, stats=None, queues=()): # builds the result once a path was found
+    if observer is not None:
+        observer.found(path)
+    result = SearchResult([grid.position(cell) for cell in path], cost, expanded, stats=stats)
+    if stats is not None:
+        stats.phase('reconstruction')
+        stats.count(expanded=expanded, path_length=len(path))
+        stats.count_queues(queues)
+    return result
+
+def stop_search(expanded, stats=None, queues=(), cancelled=False): # the result when no path was found or the search was cancelled
+    if stats is not None:
+        stats.phase('expansion')
+        stats.count(expanded=expanded)
+        stats.count_queues(queues)
+    return SearchResult([], None, expanded, cancelled, stats)
+
 def print_path(path):
     if not path: # check if the path is empty
         print("No path found")